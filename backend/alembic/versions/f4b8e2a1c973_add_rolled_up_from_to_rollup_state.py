@@ -0,0 +1,34 @@
+"""Add rolled_up_from to rollup_state
+
+Revision ID: f4b8e2a1c973
+Revises: d3a7c91e5b40
+Create Date: 2026-10-18 16:05:12.417302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8e2a1c973'
+down_revision: Union[str, None] = 'd3a7c91e5b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('rollup_state', sa.Column('rolled_up_from', sa.Date(), nullable=True))
+    # The first rolled-up day with sales is a safe lower bound for rollups built before this column existed
+    op.execute("""
+        UPDATE rollup_state
+        SET rolled_up_from = COALESCE((SELECT MIN(day) FROM sales_daily_rollup), rolled_up_to)
+        WHERE name = 'sales_daily_rollup'
+    """)
+    op.execute("UPDATE rollup_state SET rolled_up_from = rolled_up_to WHERE rolled_up_from IS NULL")
+    op.alter_column('rollup_state', 'rolled_up_from', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('rollup_state', 'rolled_up_from')
@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional
+
+from app.cache.ttl_cache import TTLCache
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Per-process LRU backend. Each cache gets its own, so `clear` drops every entry."""
+
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float):
+        self._cache.set(key, value, ttl_seconds=ttl_seconds)
+
+    def delete(self, key: str):
+        self._cache.delete(key)
+
+    def clear(self, namespace: str):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class MmapBackend:
+    """
+    Backend shared by the workers of one host through a memory-mapped file.
+    The file is a direct-mapped table of fixed-size slots: each key hashes to one slot,
+    and a newer key hashing to the same slot replaces the older one.
+    """
+
+    name = "mmap"
+
+    # namespace digest, key digest, expires at (epoch seconds), value length
+    HEADER = struct.Struct("<8s16sdI")
+
+    def __init__(self, path: str, slots: int, slot_size: int):
+        import fcntl  # POSIX only, so imported when the backend is actually used
+
+        self._fcntl = fcntl
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.capacity = slot_size - self.HEADER.size
+        self.oversize_skips = 0  # values not cached because they are larger than a slot
+
+        size = slots * slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked(exclusive=True):
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+        self._mmap = mmap.mmap(self._fd, size)
+        # flock does not exclude threads sharing the file descriptor
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_EX if exclusive else self._fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    @staticmethod
+    def _digests(key: str) -> tuple[bytes, bytes]:
+        namespace = key.split(":", 1)[0]
+        return (
+            hashlib.blake2b(namespace.encode(), digest_size=8).digest(),
+            hashlib.blake2b(key.encode(), digest_size=16).digest(),
+        )
+
+    def _offset(self, key_digest: bytes) -> int:
+        return int.from_bytes(key_digest[:8], "little") % self.slots * self.slot_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        _, key_digest = self._digests(key)
+        offset = self._offset(key_digest)
+        with self._thread_lock, self._locked(exclusive=False):
+            _, slot_key, expires_at, length = self.HEADER.unpack_from(self._mmap, offset)
+            if slot_key != key_digest or expires_at <= time.time() or length > self.capacity:
+                return None
+            start = offset + self.HEADER.size
+            return self._mmap[start:start + length]
+
+    def set(self, key: str, value: bytes, ttl_seconds: float):
+        # Values larger than a slot are not cached
+        if len(value) > self.capacity:
+            self.oversize_skips += 1
+            if self.oversize_skips == 1 or self.oversize_skips % 1000 == 0:
+                logger.warning(
+                    f"Not caching {key.split(':', 1)[0]} value of {len(value)} bytes, the mmap cache slots hold "
+                    f"{self.capacity} bytes ({self.oversize_skips} skipped so far); raise CACHE_MMAP_SLOT_SIZE."
+                )
+            return
+        namespace_digest, key_digest = self._digests(key)
+        offset = self._offset(key_digest)
+        start = offset + self.HEADER.size
+        with self._thread_lock, self._locked(exclusive=True):
+            self._mmap[start:start + len(value)] = value
+            self.HEADER.pack_into(self._mmap, offset, namespace_digest, key_digest, time.time() + ttl_seconds, len(value))
+
+    def delete(self, key: str):
+        _, key_digest = self._digests(key)
+        offset = self._offset(key_digest)
+        with self._thread_lock, self._locked(exclusive=True):
+            if self.HEADER.unpack_from(self._mmap, offset)[1] == key_digest:
+                self._mmap[offset:offset + self.HEADER.size] = bytes(self.HEADER.size)
+
+    def clear(self, namespace: str):
+        namespace_digest = hashlib.blake2b(namespace.encode(), digest_size=8).digest()
+        with self._thread_lock, self._locked(exclusive=True):
+            for offset in range(0, self.slots * self.slot_size, self.slot_size):
+                if self.HEADER.unpack_from(self._mmap, offset)[0] == namespace_digest:
+                    self._mmap[offset:offset + self.HEADER.size] = bytes(self.HEADER.size)
+
+    def stats(self) -> dict:
+        return {"path": self.path, "slots": self.slots, "slot_size": self.slot_size, "oversize_skips": self.oversize_skips}
+
+
+class RedisBackend:
+    """
+    Backend shared by every worker through Redis. `client` is anything speaking the
+    redis-py API (get/set/delete/scan_iter), so tests can pass a local stand-in.
+    """
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float):
+        self.client.set(key, value, px=max(int(ttl_seconds * 1000), 1))
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+    def clear(self, namespace: str):
+        keys = list(self.client.scan_iter(match=f"{namespace}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> dict:
+        return {}
+
+
+@lru_cache(maxsize=None)
+def get_shared_backend():
+    """
+    Returns the cross-worker backend selected by CACHE_BACKEND, or None for "memory".
+    Created on first use, so Redis is only connected to (and the mmap file only created) when configured.
+    """
+    backend = config["CACHE_BACKEND"]
+    if backend == "memory":
+        return None
+    if backend == "mmap":
+        return MmapBackend(config["CACHE_MMAP_PATH"], config["CACHE_MMAP_SLOTS"], config["CACHE_MMAP_SLOT_SIZE"])
+    if backend == "redis":
+        import redis
+
+        # Bounded timeouts, so a slow Redis costs at most this long before the cache falls back to local
+        timeout = config["CACHE_REDIS_TIMEOUT_SECONDS"]
+        return RedisBackend(redis.Redis.from_url(
+            config["CACHE_REDIS_URL"], socket_timeout=timeout, socket_connect_timeout=timeout
+        ))
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
@@ -0,0 +1,100 @@
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.cache.goods_projection import GoodsProjection
+
+
+def normalize_code(code: Optional[str]) -> Optional[str]:
+    """Codes are compared trimmed and case-insensitively, like the default SQL Server collation."""
+    code = code.strip().casefold() if code else None
+    return code or None
+
+
+class BarcodeIndex(GoodsProjection):
+    """
+    In-process hash index resolving barcodes (BarCode1-3) and codes to product IDs.
+    Lookups never touch the database. A barcode wins over a code of another product.
+    Until the cron job has loaded it, `resolve_in_db` answers lookups from dbo.Goods instead.
+    """
+
+    name = "Barcode index"
+    columns = "ID, Code, BarCode1, BarCode2, BarCode3"
+
+    def __init__(self):
+        super().__init__()
+        # Values are sorted tuples which are replaced, never mutated, so lookups need no lock
+        self.barcodes: dict[str, tuple[int, ...]] = {}
+        self.codes: dict[str, tuple[int, ...]] = {}
+        self._entries: dict[int, tuple[tuple[str, ...], Optional[str]]] = {}  # product ID -> (barcodes, code)
+        self.lookups = 0
+        self.misses = 0
+        self._lookup_query = text(
+            f"SELECT {self.columns} FROM dbo.Goods "
+            "WHERE BarCode1 IN :codes OR BarCode2 IN :codes OR BarCode3 IN :codes OR Code IN :codes"
+        ).bindparams(bindparam("codes", expanding=True))
+
+    def resolve(self, code: str) -> Optional[int]:
+        """Returns the ID of the product with this barcode or code, or None."""
+        code = normalize_code(code)
+        product_ids = (self.barcodes.get(code) or self.codes.get(code)) if code else None
+        self.lookups += 1
+        if not product_ids:
+            self.misses += 1
+            return None
+        # Several goods may share a barcode; always resolve to the lowest ID
+        return product_ids[0]
+
+    def resolve_in_db(self, mssql_db: Session, codes: list[str]) -> dict[str, Optional[int]]:
+        """Resolves codes like `resolve`, but reads the goods having them from dbo.Goods."""
+        normalized = list({code for code in map(normalize_code, codes) if code})
+        index = BarcodeIndex()
+        if normalized:
+            for row in mssql_db.execute(self._lookup_query, {"codes": normalized}):
+                index._update(row.ID, row)
+        return {code: index.resolve(code) for code in codes}
+
+    def _update(self, product_id: int, row):
+        old_barcodes, old_code = self._entries.pop(product_id, ((), None))
+        for barcode in old_barcodes:
+            self._discard(self.barcodes, barcode, product_id)
+        if old_code:
+            self._discard(self.codes, old_code, product_id)
+
+        if row is None:
+            return
+        barcodes = tuple(dict.fromkeys(
+            barcode for barcode in map(normalize_code, (row.BarCode1, row.BarCode2, row.BarCode3)) if barcode
+        ))
+        code = normalize_code(row.Code)
+        for barcode in barcodes:
+            self._add(self.barcodes, barcode, product_id)
+        if code:
+            self._add(self.codes, code, product_id)
+        self._entries[product_id] = (barcodes, code)
+
+    @staticmethod
+    def _add(index: dict, key: str, product_id: int):
+        index[key] = tuple(sorted({*index.get(key, ()), product_id}))
+
+    @staticmethod
+    def _discard(index: dict, key: str, product_id: int):
+        product_ids = tuple(id_ for id_ in index.get(key, ()) if id_ != product_id)
+        if product_ids:
+            index[key] = product_ids
+        else:
+            index.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "products": len(self._entries),
+            "barcodes": len(self.barcodes),
+            "codes": len(self.codes),
+            "lookups": self.lookups,
+            "misses": self.misses,
+        }
+
+
+barcode_index = BarcodeIndex()
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from app.cache.serializers import ModelSerializer
+from app.cache.store import Cache
+from app.config import config
+from app.schemas.dashboard import DashboardResponse
+
+# (window, viewer) -> DashboardResponse
+dashboard_cache = Cache(
+    "dashboard",
+    max_size=config["DASHBOARD_CACHE_MAX_SIZE"],
+    ttl_seconds=config["DASHBOARD_CACHE_TTL_SECONDS"],
+    serializer=ModelSerializer(DashboardResponse),
+)
+
+
+def _dashboard_key(start_date: str, end_date: str, microinvest_user_id: int, is_staff: bool) -> tuple:
+    # Staff all see the same dashboard, everybody else only their own sales
+    return str(start_date), str(end_date), "staff" if is_staff else microinvest_user_id
+
+
+async def get_cached_dashboard(start_date: str, end_date: str, microinvest_user_id: int, is_staff: bool) -> Optional[DashboardResponse]:
+    return await dashboard_cache.aget(_dashboard_key(start_date, end_date, microinvest_user_id, is_staff))
+
+
+async def cache_dashboard(start_date: str, end_date: str, microinvest_user_id: int, is_staff: bool, dashboard: DashboardResponse):
+    await dashboard_cache.aset(_dashboard_key(start_date, end_date, microinvest_user_id, is_staff), dashboard)
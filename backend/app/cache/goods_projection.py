@@ -0,0 +1,85 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from sqlalchemy import bindparam, func, text
+from sqlalchemy.orm import Session
+
+from app.db.query_builder import MAX_IDS_PER_QUERY
+from app.models import ProductSyncState
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH_SIZE = 5000
+
+
+class GoodsProjection(ABC):
+    """
+    In-process projection of some dbo.Goods columns, kept per worker.
+    - The first refresh loads every good; later refreshes only re-read the goods
+      the product sync job marked as changed since the loaded sync version.
+    - Subclasses name their `columns` and implement `_update`, which gets None for removed goods.
+    - Only the cron job refreshes it, in its own thread: the refresh holds a lock while reading
+      both databases, which would block the event loop if run from a request.
+    """
+
+    name = "goods"
+    columns = "ID"
+
+    def __init__(self):
+        self.version: Optional[int] = None  # Product sync version the projection reflects, None until loaded
+        self.refreshes = 0
+        self._refresh_lock = threading.Lock()
+        self._load_query = text(f"SELECT {self.columns} FROM dbo.Goods")
+        self._load_by_ids_query = text(f"SELECT {self.columns} FROM dbo.Goods WHERE ID IN :good_ids").bindparams(
+            bindparam("good_ids", expanding=True)
+        )
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def refresh(self, pg_db: Session, mssql_db: Session) -> int:
+        """Loads the projection, or applies the goods changed since the last refresh. Returns the number of changed goods."""
+        with self._refresh_lock:
+            # Read the version first, so changes made while loading are applied again next time
+            version = pg_db.query(func.max(ProductSyncState.version)).scalar() or 0
+            if not self.loaded:
+                result = mssql_db.execute(self._load_query, execution_options={"yield_per": LOAD_BATCH_SIZE})
+                changed = 0
+                for row in result:
+                    self._update(row.ID, row)
+                    changed += 1
+                logger.info(f"{self.name} loaded {changed} goods at sync version {version}.")
+            else:
+                if version == self.version:
+                    return 0
+                changed_ids = [
+                    good_id for good_id, in pg_db.query(ProductSyncState.good_id).filter(ProductSyncState.version > self.version)
+                ]
+                rows = self.load_goods(mssql_db, changed_ids)
+                # Goods missing from Microinvest were removed
+                for good_id in changed_ids:
+                    self._update(good_id, rows.get(good_id))
+                changed = len(changed_ids)
+
+            self.version = version
+            self.refreshes += 1
+            return changed
+
+    def load_goods(self, mssql_db: Session, good_ids: list[int]) -> dict:
+        """Reads the projected columns of the given goods, keyed by ID."""
+        rows = {}
+        for start in range(0, len(good_ids), MAX_IDS_PER_QUERY):
+            chunk = good_ids[start:start + MAX_IDS_PER_QUERY]
+            for row in mssql_db.execute(self._load_by_ids_query, {"good_ids": chunk}):
+                rows[row.ID] = row
+        return rows
+
+    @abstractmethod
+    def _update(self, good_id: int, row):
+        """Applies one good's projected columns, or removes the good when `row` is None."""
+
+    def stats(self) -> dict:
+        return {"loaded": self.loaded, "version": self.version, "refreshes": self.refreshes}
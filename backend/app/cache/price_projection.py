@@ -0,0 +1,75 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.cache.goods_projection import GoodsProjection
+
+PRICE_GROUPS = range(1, 11)  # PriceOut1..PriceOut10
+PRICE_COLUMNS = ", ".join(f"PriceOut{group}" for group in PRICE_GROUPS)
+# Goods without any positive price have no price_out and are not listed as products
+HAS_PRICE_CONDITION = "(" + " OR ".join(f"PriceOut{group} > 0" for group in PRICE_GROUPS) + ")"
+
+
+class PriceProjection(GoodsProjection):
+    """
+    In-process projection of the selling prices (PriceOut1-10) of every good.
+    - The default price_out is the lowest positive price, computed once per change of the good.
+    - A price group (`PartnerResponse.price_group`) picks its own PriceOutN column
+      and falls back to the default when that price is not set.
+    """
+
+    name = "Price projection"
+    columns = f"ID, {PRICE_COLUMNS}"
+
+    def __init__(self):
+        super().__init__()
+        # good ID -> (lowest positive price, prices by group); replaced, never mutated
+        self._prices: dict[int, tuple[Optional[float], tuple[Optional[float], ...]]] = {}
+        self.misses = 0
+        # Goods with a positive price (those listed as products) as of the last refresh, None until loaded
+        self.priced_goods: Optional[int] = None
+
+    def price_out(self, good_id: int, price_group: Optional[int] = None) -> Optional[float]:
+        """Returns the selling price of a good, for the given price group if it has one."""
+        entry = self._prices.get(good_id)
+        if entry is None:
+            return None
+        lowest_price, prices = entry
+        if price_group in PRICE_GROUPS and prices[price_group - 1]:
+            return prices[price_group - 1]
+        return lowest_price
+
+    def refresh(self, pg_db: Session, mssql_db: Session) -> int:
+        changed = super().refresh(pg_db, mssql_db)
+        if changed or self.priced_goods is None:
+            self.priced_goods = sum(1 for lowest_price, _ in list(self._prices.values()) if lowest_price is not None)
+        return changed
+
+    def ensure(self, mssql_db: Session, good_ids: list[int]):
+        """Reads the prices of goods not projected yet, e.g. goods added since the last refresh."""
+        missing = [good_id for good_id in good_ids if good_id not in self._prices]
+        if missing:
+            self.misses += len(missing)
+            self.update(self.load_goods(mssql_db, missing))
+
+    def update(self, rows: dict):
+        """Projects rows carrying the PriceOut1-10 columns, keyed by good ID."""
+        for good_id, row in rows.items():
+            self._update(good_id, row)
+
+    def _update(self, good_id: int, row):
+        if row is None:
+            self._prices.pop(good_id, None)
+            return
+        prices = tuple(
+            float(price) if price is not None and price > 0 else None
+            for price in (getattr(row, f"PriceOut{group}") for group in PRICE_GROUPS)
+        )
+        positive_prices = [price for price in prices if price is not None]
+        self._prices[good_id] = (min(positive_prices) if positive_prices else None, prices)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "products": len(self._prices), "priced_goods": self.priced_goods, "misses": self.misses}
+
+
+price_projection = PriceProjection()
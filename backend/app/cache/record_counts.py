@@ -0,0 +1,61 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
+
+from app.cache.serializers import JsonSerializer
+from app.cache.store import Cache
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+# (listing, filter signature) -> total number of matching records
+record_count_cache = Cache(
+    "record_count",
+    max_size=config["RECORD_COUNT_CACHE_MAX_SIZE"],
+    ttl_seconds=config["RECORD_COUNT_CACHE_TTL_SECONDS"],
+    serializer=JsonSerializer(),
+)
+
+# Row count of a table (heap or clustered index) from SQL Server's partition statistics
+APPROXIMATE_COUNT_QUERY = """
+    SELECT SUM(row_count)
+    FROM sys.dm_db_partition_stats
+    WHERE object_id = OBJECT_ID(:table_name)
+    AND index_id IN (0, 1)
+"""
+
+
+async def count_records(db: AsyncSession, listing: str, statement: TextClause, params: dict) -> int:
+    """
+    Returns the result of the COUNT(*) `statement`, cached per listing and filter parameters.
+    `params` must hold the filter parameters only, not the pagination ones.
+    """
+    key = (listing, tuple(sorted(params.items())))
+    total_records = await record_count_cache.aget(key)
+    if total_records is None:
+        total_records = (await db.execute(statement, params)).scalar()
+        await record_count_cache.aset(key, total_records)
+    return total_records
+
+
+async def approximate_record_count(db: AsyncSession, table_name: str) -> Optional[int]:
+    """
+    Returns the row count SQL Server keeps for `table_name` without scanning it.
+    Returns None if the statistics cannot be read (they need VIEW DATABASE STATE).
+    """
+    key = ("approximate", table_name)
+    total_records = await record_count_cache.aget(key)
+    if total_records is None:
+        try:
+            total_records = (await db.execute(text(APPROXIMATE_COUNT_QUERY), {"table_name": table_name})).scalar()
+        except DBAPIError as e:
+            logger.warning(f"Could not read the row count statistics of {table_name}: {e}")
+            return None
+        if total_records is None:
+            return None
+        await record_count_cache.aset(key, int(total_records))
+    return int(total_records)
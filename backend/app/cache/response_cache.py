@@ -0,0 +1,63 @@
+import hashlib
+from typing import Hashable, Optional, Union
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.cache.serializers import JsonSerializer
+from app.cache.store import Cache
+from app.config import config
+from app.serialization import dumps
+
+# (route, normalized query params, visibility) -> {"etag": ETag, "body": serialized JSON body}
+response_cache = Cache(
+    "response",
+    max_size=config["RESPONSE_CACHE_MAX_SIZE"],
+    ttl_seconds=config["RESPONSE_CACHE_TTL_SECONDS"],
+    serializer=JsonSerializer(),
+)
+
+# Clients must revalidate with If-None-Match, since the cached pages change with the ERP data
+CACHE_CONTROL = "private, no-cache"
+
+
+def response_cache_key(request: Request, visibility: str) -> Hashable:
+    """
+    Returns the cache key of a list request. Blank query params are dropped and the rest
+    sorted, so equivalent URLs share an entry. `visibility` separates callers who see
+    different fields (e.g. superusers, who see price_in).
+    """
+    params = tuple(sorted(
+        (name, value.strip()) for name, value in request.query_params.multi_items() if value.strip()
+    ))
+    return request.url.path, params, visibility
+
+
+async def get_cached_response(request: Request, key: Hashable) -> Optional[Response]:
+    """Returns the cached response for `key` (304 if the client already has it), or None."""
+    entry = await response_cache.aget(key)
+    if entry is None:
+        return None
+    return _build_response(request, entry["etag"], entry["body"].encode())
+
+
+async def cache_response(request: Request, key: Hashable, payload: Union[BaseModel, dict]) -> Response:
+    """
+    Serializes `payload` once, caches it under `key` and returns it with its ETag.
+    A dict payload must already have the shape of the response model; it is encoded without validation.
+    """
+    body = payload.model_dump_json().encode() if isinstance(payload, BaseModel) else dumps(payload)
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    await response_cache.aset(key, {"etag": etag, "body": body.decode()})
+    return _build_response(request, etag, body)
+
+
+def _build_response(request: Request, etag: str, body: bytes) -> Response:
+    # The same URL also serves columnar formats, chosen by the Accept header
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept"}
+    # Weak validators (W/"...") match too, e.g. after a proxy compressed the body
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
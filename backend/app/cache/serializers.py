@@ -0,0 +1,41 @@
+import json
+import pickle
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class JsonSerializer:
+    """Serializes JSON-compatible values (numbers, strings, lists, dicts)."""
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class ModelSerializer:
+    """Serializes instances of one pydantic model through its JSON representation."""
+
+    def __init__(self, model: type[BaseModel]):
+        self.model = model
+
+    def dumps(self, value: BaseModel) -> bytes:
+        return value.model_dump_json().encode()
+
+    def loads(self, data: bytes) -> BaseModel:
+        return self.model.model_validate_json(data)
+
+
+class PickleSerializer:
+    """
+    Serializes any picklable value. Opt-in, and only accepted with the per-process MemoryBackend,
+    since unpickling runs code chosen by whoever wrote the entry.
+    """
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import threading
+from typing import Any, Hashable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.cache.backends import MemoryBackend, get_shared_backend
+from app.cache.serializers import JsonSerializer, PickleSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class Cache:
+    """
+    A namespaced cache on top of a pluggable backend and serializer.
+    - The backend is the shared one selected by CACHE_BACKEND, or a per-process LRU.
+    - If the shared backend fails, the cache falls back to its per-process LRU until it recovers.
+    - Values are stored as JSON unless another serializer is given. PickleSerializer is refused
+      on a shared backend, where anyone able to write to Redis or the mmap file could run code here.
+    Offers the same get/set/delete/clear/stats methods as TTLCache.
+    Async routes use `aget`/`aset`, which keep shared backend I/O (Redis, file locks) off the event loop.
+    """
+
+    def __init__(self, namespace: str, max_size: int, ttl_seconds: float, serializer=None, backend=None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.serializer = serializer or JsonSerializer()
+        self.local = MemoryBackend(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.backend = backend or get_shared_backend() or self.local
+        if isinstance(self.serializer, PickleSerializer) and not isinstance(self.backend, MemoryBackend):
+            raise ValueError(f"Cache {namespace} cannot use PickleSerializer on the shared {self.backend.name} backend.")
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self._failing = False
+        self._lock = threading.Lock()
+
+    def _key(self, key: Hashable) -> str:
+        if not isinstance(key, str):
+            key = hashlib.sha1(repr(key).encode()).hexdigest()
+        return f"{self.namespace}:{key}"
+
+    def _call(self, operation: str, *args):
+        if self.backend is not self.local:
+            try:
+                result = getattr(self.backend, operation)(*args)
+                if self._failing:
+                    self._failing = False
+                    logger.info(f"Cache backend {self.backend.name} recovered for {self.namespace}.")
+                return result
+            except Exception as e:
+                with self._lock:
+                    self.fallbacks += 1
+                if not self._failing:
+                    self._failing = True
+                    logger.warning(f"Cache backend {self.backend.name} failed for {self.namespace}, using the local cache: {e}")
+        return getattr(self.local, operation)(*args)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        data = self._call("get", self._key(key))
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return default if data is None else self.serializer.loads(data)
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._call("set", self._key(key), self.serializer.dumps(value), ttl_seconds)
+
+    async def aget(self, key: Hashable, default: Any = None) -> Any:
+        if self.backend is self.local:
+            return self.get(key, default)
+        return await run_in_threadpool(self.get, key, default)
+
+    async def aset(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        if self.backend is self.local:
+            self.set(key, value, ttl_seconds)
+        else:
+            await run_in_threadpool(self.set, key, value, ttl_seconds)
+
+    def delete(self, key: Hashable):
+        self._call("delete", self._key(key))
+
+    def clear(self):
+        self._call("clear", self.namespace)
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters of this cache and the details of its backend."""
+        with self._lock:
+            return {
+                **self.backend.stats(),
+                "backend": self.backend.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "fallbacks": self.fallbacks,
+                "ttl_seconds": self.ttl_seconds,
+            }
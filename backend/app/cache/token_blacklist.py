@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import select
+import threading
+import time
+from typing import Callable, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import config
+from app.db.database import PostgresSessionLocal, postgres_engine
+
+logger = logging.getLogger(__name__)
+
+
+def hash_token(token: str) -> str:
+    """Returns the SHA-256 hex digest used as the cache key for a token."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_token_expiry(token: str) -> float:
+    """Returns the `exp` claim of a token as a unix timestamp (the signature is not verified)."""
+    try:
+        expires_at = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        expires_at = None
+
+    if expires_at is None:
+        # Fall back to the longest lifetime a token issued by us can have
+        return time.time() + config["ACCESS_TOKEN_EXPIRE_MINUTES"] * 60
+    return float(expires_at)
+
+
+class TokenBlacklistCache:
+    """
+    In-memory mirror of the `token_blacklist` table, keyed on token hashes.
+    - Logouts from other workers are pushed in immediately through Postgres LISTEN/NOTIFY.
+    - A miss means the token is not blacklisted, so Postgres is not queried. Misses are only
+      trusted while the listener is connected and the mirror was loaded after it started listening;
+      otherwise a logout on another worker could be missed, so every token is checked in Postgres.
+    - A hit is only a possible match and should be confirmed against Postgres.
+    - Entries are dropped once the JWT `exp` has passed, since such tokens are rejected anyway.
+    - The mirror is reloaded in the background (see `refresh_token_blacklist_job`), never in a request.
+    Other per-worker caches can send their invalidations over the same channel (see `subscribe`).
+    """
+
+    def __init__(self, channel: Optional[str] = None):
+        self.channel = channel
+        self._entries: dict[str, float] = {}  # token hash -> exp timestamp
+        self._loaded_at: Optional[float] = None
+        self._listening_since: Optional[float] = None  # monotonic time the current LISTEN started
+        self._lock = threading.Lock()
+        self._handlers: dict[str, Callable[[str], None]] = {}  # message kind -> handler
+
+    def add(self, token: str):
+        """Adds a token to the in-memory blacklist."""
+        self.add_hash(hash_token(token), get_token_expiry(token))
+
+    def add_hash(self, token_hash: str, expires_at: float):
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[token_hash] = expires_at
+
+    def is_authoritative(self) -> bool:
+        """Whether a miss can be trusted: the listener is connected and the mirror was loaded since."""
+        listening_since, loaded_at = self._listening_since, self._loaded_at
+        return listening_since is not None and loaded_at is not None and loaded_at >= listening_since
+
+    def might_contain(self, token: str) -> bool:
+        """Returns False if the token is definitely not blacklisted."""
+        if not self.is_authoritative():
+            return True
+
+        token_hash = hash_token(token)
+        with self._lock:
+            expires_at = self._entries.get(token_hash)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self._entries[token_hash]
+                return False
+        return True
+
+    def load(self, db: Session):
+        """Reloads the mirror from the `token_blacklist` table, skipping expired tokens."""
+        loaded_at = time.monotonic()
+        now = time.time()
+        entries = {}
+        for (token,) in db.query(models.TokenBlacklist.token).all():
+            expires_at = get_token_expiry(token)
+            if expires_at > now:
+                entries[hash_token(token)] = expires_at
+
+        with self._lock:
+            # Notifications received while loading are kept, they may be newer than the rows read
+            for token_hash, expires_at in self._entries.items():
+                if expires_at > now:
+                    entries.setdefault(token_hash, expires_at)
+            self._entries = entries
+            # When loading started, so a load racing a reconnect does not count as loaded after it
+            self._loaded_at = loaded_at
+
+    def publish(self, token: str, db: Session):
+        """Notifies the other workers about a blacklisted token (delivered when `db` commits)."""
+        if not self.channel:
+            return
+        payload = f"{hash_token(token)}:{get_token_expiry(token)}"
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+
+    def subscribe(self, kind: str, handler: Callable[[str], None]):
+        """Calls `handler` (on the listener thread) with each message of this kind sent through `publish_message`."""
+        self._handlers[kind] = handler
+
+    def publish_message(self, kind: str, message: str, db: Session):
+        """Sends a message to the `kind` handlers of every worker (delivered when `db` commits)."""
+        if not self.channel:
+            return
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": f"{kind}:{message}"})
+
+    def start_listener(self):
+        """Starts a daemon thread listening for blacklisted tokens from other workers."""
+        if not self.channel:
+            return
+        thread = threading.Thread(target=self._listen, name="token-blacklist-listener", daemon=True)
+        thread.start()
+        logger.info(f"Listening for blacklisted tokens on channel '{self.channel}'.")
+
+    def _listen(self):
+        while True:
+            try:
+                self._listen_once()
+            except Exception as e:
+                logger.warning(f"Token blacklist listener disconnected: {e}")
+            time.sleep(5)
+
+    def _listen_once(self):
+        # A dedicated connection, so the listener does not hold one of the pool's connections
+        cargs, cparams = postgres_engine.dialect.create_connect_args(postgres_engine.url)
+        connection = postgres_engine.dialect.connect(*cargs, **cparams)
+        try:
+            connection.autocommit = True
+            connection.cursor().execute(f'LISTEN "{self.channel}"')
+            self._listening_since = time.monotonic()
+
+            # Notifications may have been missed while disconnected, so reload before trusting misses
+            db = PostgresSessionLocal()
+            try:
+                self.load(db)
+            finally:
+                db.close()
+
+            while True:
+                if select.select([connection], [], [], 60) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notification = connection.notifies.pop(0)
+                    # Token hashes are hex digests, so they never collide with a message kind
+                    kind, _, message = notification.payload.partition(":")
+                    handler = self._handlers.get(kind)
+                    if handler is not None:
+                        handler(message)
+                    else:
+                        self.add_hash(kind, float(message))
+        finally:
+            self._listening_since = None
+            connection.close()
+
+
+token_blacklist_cache = TokenBlacklistCache(
+    channel=config["TOKEN_BLACKLIST_CHANNEL"],
+)
@@ -0,0 +1,60 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.cache.serializers import JsonSerializer, ModelSerializer
+from app.cache.store import Cache
+from app.cache.token_blacklist import token_blacklist_cache
+from app.config import config
+from app.schemas.user_mapping import UserMappingResponse
+
+# Kind of the messages telling the other workers a user's mapping changed
+USER_MAPPING_MESSAGE = "user_mapping"
+
+# Token subject (email) -> resolved UserMappingResponse
+user_mapping_cache = Cache(
+    "user_mapping",
+    max_size=config["USER_MAPPING_CACHE_MAX_SIZE"],
+    ttl_seconds=config["USER_MAPPING_CACHE_TTL_SECONDS"],
+    serializer=ModelSerializer(UserMappingResponse),
+)
+
+# User ID -> token subject, so mapping changes can invalidate by user ID
+_subject_by_user_id = Cache(
+    "user_mapping_subject",
+    max_size=config["USER_MAPPING_CACHE_MAX_SIZE"],
+    ttl_seconds=config["USER_MAPPING_CACHE_TTL_SECONDS"],
+    serializer=JsonSerializer(),
+)
+
+
+async def get_cached_user_mapping(email: str) -> Optional[UserMappingResponse]:
+    """Returns the cached Microinvest mapping of the user with the given email, if any."""
+    return await user_mapping_cache.aget(email)
+
+
+async def cache_user_mapping(email: str, user_mapping: UserMappingResponse):
+    await user_mapping_cache.aset(email, user_mapping)
+    await _subject_by_user_id.aset(user_mapping.user_id, email)
+
+
+def invalidate_user_mapping(user_id: int, db: Optional[Session] = None):
+    """
+    Drops the cached mapping of a user, e.g. after the user was mapped, unmapped or deleted.
+    With `db`, the other workers are told to drop theirs too, over the TOKEN_BLACKLIST_CHANNEL
+    (committed here). Workers which miss the message keep the mapping for USER_MAPPING_CACHE_TTL_SECONDS.
+    """
+    _drop_user_mapping(user_id)
+    if db is not None:
+        token_blacklist_cache.publish_message(USER_MAPPING_MESSAGE, str(user_id), db)
+        db.commit()
+
+
+def _drop_user_mapping(user_id: int):
+    email = _subject_by_user_id.get(user_id)
+    if email is not None:
+        user_mapping_cache.delete(email)
+    _subject_by_user_id.delete(user_id)
+
+
+token_blacklist_cache.subscribe(USER_MAPPING_MESSAGE, lambda message: _drop_user_mapping(int(message)))
@@ -0,0 +1,95 @@
+import importlib.util
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+
+from app.serialization import RowSerializer
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Accepted media types of the columnar formats, to the format they select
+COLUMNAR_MEDIA_TYPES = {
+    ARROW_MEDIA_TYPE: "arrow",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+# Optional packages encoding each format
+FORMAT_PACKAGES = {"arrow": "pyarrow", "msgpack": "msgpack"}
+
+
+def negotiate_columnar_format(request: Request) -> Optional[str]:
+    """
+    Returns "arrow" or "msgpack" when the Accept header prefers one of them over JSON, otherwise None.
+    Media types are ranked by their q value, then by their order in the header.
+    Answers 406 if the package encoding the preferred format is not installed.
+    """
+    accepted = []
+    for position, item in enumerate(request.headers.get("accept", "").split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            accepted.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(accepted):
+        if media_type in COLUMNAR_MEDIA_TYPES:
+            columnar_format = COLUMNAR_MEDIA_TYPES[media_type]
+            package = FORMAT_PACKAGES[columnar_format]
+            if importlib.util.find_spec(package) is None:
+                raise HTTPException(status_code=406, detail=f"{media_type} responses require the {package} package on the server.")
+            return columnar_format
+        if media_type in ("application/json", "application/*", "*/*"):
+            return None
+    return None
+
+
+def columnar_response(columnar_format: str, serializer: RowSerializer, meta: dict, rows_key: str, columns: dict) -> Response:
+    """
+    Encodes a list response with its rows column by column: the response fields are kept
+    and `rows_key` (e.g. "operations") holds one list of values per column instead of one object per row.
+    - msgpack: a map of the response fields, where `rows_key` maps column names to value arrays.
+    - arrow: an Arrow IPC stream of the rows; the other response fields are in the schema metadata.
+    """
+    if columnar_format == "arrow":
+        return Response(content=_to_arrow(serializer, meta, columns), media_type=ARROW_MEDIA_TYPE, headers={"Vary": "Accept"})
+    return Response(content=_to_msgpack({**meta, rows_key: columns}), media_type=MSGPACK_MEDIA_TYPE, headers={"Vary": "Accept"})
+
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _to_msgpack(content: dict) -> bytes:
+    import msgpack
+
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+def _to_arrow(serializer: RowSerializer, meta: dict, columns: dict) -> bytes:
+    import pyarrow as pa
+
+    arrow_types = {float: pa.float64(), int: pa.int64(), str: pa.string(), datetime: pa.timestamp("ms")}
+    schema = pa.schema(
+        [pa.field(name, arrow_types.get(serializer.types[name], pa.string())) for name in columns],
+        metadata={name: json.dumps(value) for name, value in meta.items()}
+    )
+    batch = pa.record_batch([pa.array(values, type=field.type) for values, field in zip(columns.values(), schema)], schema=schema)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
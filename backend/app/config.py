@@ -1,5 +1,6 @@
 from dotenv import load_dotenv, dotenv_values
 import os
+import tempfile
 
 env_path = os.path.join(os.path.dirname(__file__), ".env")
 load_dotenv(env_path, verbose=True)
@@ -18,10 +19,80 @@ config = {
     "MSSQL_USER": os.getenv("MSSQL_USER"),
     "MSSQL_PASSWORD": os.getenv("MSSQL_PASSWORD"),
     "MSSQL_DRIVER": os.getenv("MSSQL_DRIVER"),
+    "MSSQL_REPLICA_URLS": os.getenv("MSSQL_REPLICA_URLS", ""),
+    "MSSQL_REPLICA_RETRY_SECONDS": int(os.getenv("MSSQL_REPLICA_RETRY_SECONDS", 30)),
+
+    # Connection pool config
+    "POSTGRES_POOL_SIZE": int(os.getenv("POSTGRES_POOL_SIZE", 5)),
+    "POSTGRES_MAX_OVERFLOW": int(os.getenv("POSTGRES_MAX_OVERFLOW", 10)),
+    "POSTGRES_POOL_TIMEOUT": int(os.getenv("POSTGRES_POOL_TIMEOUT", 30)),
+    "POSTGRES_POOL_RECYCLE": int(os.getenv("POSTGRES_POOL_RECYCLE", 1800)),
+    "POSTGRES_POOL_PRE_PING": os.getenv("POSTGRES_POOL_PRE_PING", "true").lower() == "true",
+    "MSSQL_POOL_SIZE": int(os.getenv("MSSQL_POOL_SIZE", 5)),
+    "MSSQL_MAX_OVERFLOW": int(os.getenv("MSSQL_MAX_OVERFLOW", 10)),
+    "MSSQL_POOL_TIMEOUT": int(os.getenv("MSSQL_POOL_TIMEOUT", 30)),
+    "MSSQL_POOL_RECYCLE": int(os.getenv("MSSQL_POOL_RECYCLE", 1800)),
+    "MSSQL_POOL_PRE_PING": os.getenv("MSSQL_POOL_PRE_PING", "true").lower() == "true",
 
     # JWT config
     "SECRET_KEY": os.getenv("SECRET_KEY"),
     "ALGORITHM": os.getenv("ALGORITHM"),
-    "ACCESS_TOKEN_EXPIRE_MINUTES": int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+    "ACCESS_TOKEN_EXPIRE_MINUTES": int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")),
+
+    # Token blacklist cache config
+    "TOKEN_BLACKLIST_REFRESH_SECONDS": int(os.getenv("TOKEN_BLACKLIST_REFRESH_SECONDS", 30)),
+    "TOKEN_BLACKLIST_CHANNEL": os.getenv("TOKEN_BLACKLIST_CHANNEL", "token_blacklist"),
+
+    # Cache backend config ("memory", "mmap" or "redis")
+    "CACHE_BACKEND": os.getenv("CACHE_BACKEND", "memory"),
+    "CACHE_REDIS_URL": os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"),
+    "CACHE_REDIS_TIMEOUT_SECONDS": float(os.getenv("CACHE_REDIS_TIMEOUT_SECONDS", 0.25)),
+    "CACHE_MMAP_PATH": os.getenv("CACHE_MMAP_PATH") or os.path.join(tempfile.gettempdir(), "distributor-cache"),
+    "CACHE_MMAP_SLOTS": int(os.getenv("CACHE_MMAP_SLOTS", 1024)),
+    "CACHE_MMAP_SLOT_SIZE": int(os.getenv("CACHE_MMAP_SLOT_SIZE", 262144)),
+
+    # User mapping cache config
+    "USER_MAPPING_CACHE_TTL_SECONDS": int(os.getenv("USER_MAPPING_CACHE_TTL_SECONDS", 60)),
+    "USER_MAPPING_CACHE_MAX_SIZE": int(os.getenv("USER_MAPPING_CACHE_MAX_SIZE", 1024)),
+
+    # Record count cache config
+    "RECORD_COUNT_CACHE_TTL_SECONDS": int(os.getenv("RECORD_COUNT_CACHE_TTL_SECONDS", 30)),
+    "RECORD_COUNT_CACHE_MAX_SIZE": int(os.getenv("RECORD_COUNT_CACHE_MAX_SIZE", 2048)),
+
+    # Response cache config
+    "RESPONSE_CACHE_TTL_SECONDS": int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30)),
+    "RESPONSE_CACHE_MAX_SIZE": int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 512)),
+
+    # Dashboard cache config
+    "DASHBOARD_CACHE_TTL_SECONDS": int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 60)),
+    "DASHBOARD_CACHE_MAX_SIZE": int(os.getenv("DASHBOARD_CACHE_MAX_SIZE", 256)),
+
+    # Sales rollup config
+    "SALES_ROLLUP_REFRESH_MINUTES": int(os.getenv("SALES_ROLLUP_REFRESH_MINUTES", 15)),
+    "SALES_ROLLUP_BACKFILL_DAYS": int(os.getenv("SALES_ROLLUP_BACKFILL_DAYS", 400)),
+    "SALES_ROLLUP_LOOKBACK_DAYS": int(os.getenv("SALES_ROLLUP_LOOKBACK_DAYS", 2)),
+    "SALES_ROLLUP_MIN_DAYS": int(os.getenv("SALES_ROLLUP_MIN_DAYS", 30)),
+
+    # Product delta sync config
+    "PRODUCT_SYNC_REFRESH_MINUTES": int(os.getenv("PRODUCT_SYNC_REFRESH_MINUTES", 5)),
+
+    # Barcode index and price projection config
+    "GOODS_PROJECTION_REFRESH_SECONDS": int(os.getenv("GOODS_PROJECTION_REFRESH_SECONDS", 60)),
+
+    # Response compression config
+    "COMPRESSION_ENABLED": os.getenv("COMPRESSION_ENABLED", "true").lower() == "true",
+    "COMPRESSION_MINIMUM_SIZE": int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024)),
+    "COMPRESSION_GZIP_LEVEL": int(os.getenv("COMPRESSION_GZIP_LEVEL", 6)),
+    "COMPRESSION_BROTLI_QUALITY": int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4)),
+
+    # Product/partner search config
+    "SEARCH_INDEX_REFRESH_MINUTES": int(os.getenv("SEARCH_INDEX_REFRESH_MINUTES", 10)),
+    "SEARCH_SIMILARITY_THRESHOLD": float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", 0.4)),
+
+    # Request timing and query instrumentation config
+    "REQUEST_TIMING_ENABLED": os.getenv("REQUEST_TIMING_ENABLED", "true").lower() == "true",
+    "SLOW_QUERY_MS": int(os.getenv("SLOW_QUERY_MS", 500)),
+    "SERVER_TIMING_ENABLED": os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true",
+    "METRICS_TOKEN": os.getenv("METRICS_TOKEN", ""),
 }
 
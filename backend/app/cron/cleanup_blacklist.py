@@ -1,4 +1,3 @@
-from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import logging
@@ -19,11 +18,3 @@ def delete_expired_tokens():
     db.close()
 
     logger.info(f"Deleted {deleted_tokens} expired tokens from the blacklist.")
-
-def start_cron():
-    """Starts the cron job for cleaning up the blacklist table."""
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(delete_expired_tokens, "interval", hours=24)
-    scheduler.start()
-
-    logger.info("Cron job for cleaning up blacklist started.")
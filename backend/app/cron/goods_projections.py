@@ -0,0 +1,24 @@
+from sqlalchemy.orm import Session
+import logging
+
+from app.cache.barcode_index import barcode_index
+from app.cache.price_projection import price_projection
+from app.db.database import PostgresSessionLocal, MSSQLReadSessionLocal
+
+logger = logging.getLogger(__name__)
+
+GOODS_PROJECTIONS = [barcode_index, price_projection]
+
+def refresh_goods_projections_job():
+    """Applies the goods changed since the last refresh to this worker's barcode index and price projection."""
+    pg_db: Session = PostgresSessionLocal()
+    mssql_db: Session = MSSQLReadSessionLocal()
+    try:
+        for projection in GOODS_PROJECTIONS:
+            try:
+                projection.refresh(pg_db, mssql_db)
+            except Exception as e:
+                logger.error(f"{projection.name} refresh failed: {e}")
+    finally:
+        pg_db.close()
+        mssql_db.close()
@@ -0,0 +1,19 @@
+from sqlalchemy.orm import Session
+import logging
+
+from app.db.database import PostgresSessionLocal, MSSQLReadSessionLocal
+from app.services.product_sync import refresh_product_sync_state
+
+logger = logging.getLogger(__name__)
+
+def refresh_product_sync_job():
+    """Detects goods changed since the previous run for the catalog delta sync."""
+    pg_db: Session = PostgresSessionLocal()
+    mssql_db: Session = MSSQLReadSessionLocal()
+    try:
+        refresh_product_sync_state(pg_db, mssql_db)
+    except Exception as e:
+        logger.error(f"Product sync refresh failed: {e}")
+    finally:
+        pg_db.close()
+        mssql_db.close()
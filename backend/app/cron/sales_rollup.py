@@ -0,0 +1,19 @@
+from sqlalchemy.orm import Session
+import logging
+
+from app.db.database import PostgresSessionLocal, MSSQLReadSessionLocal
+from app.services.sales_rollup import refresh_sales_rollup
+
+logger = logging.getLogger(__name__)
+
+def refresh_sales_rollup_job():
+    """Refreshes the daily sales rollup used by the dashboard."""
+    pg_db: Session = PostgresSessionLocal()
+    mssql_db: Session = MSSQLReadSessionLocal()
+    try:
+        refresh_sales_rollup(pg_db, mssql_db)
+    except Exception as e:
+        logger.error(f"Sales rollup refresh failed: {e}")
+    finally:
+        pg_db.close()
+        mssql_db.close()
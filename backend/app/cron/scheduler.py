@@ -0,0 +1,54 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime
+import logging
+
+from app.config import config
+from app.cron.goods_projections import refresh_goods_projections_job
+from app.cron.cleanup_blacklist import delete_expired_tokens
+from app.cron.product_sync import refresh_product_sync_job
+from app.cron.sales_rollup import refresh_sales_rollup_job
+from app.cron.search_index import refresh_search_index_job
+from app.cron.token_blacklist import refresh_token_blacklist_job
+
+logger = logging.getLogger(__name__)
+
+scheduler = BackgroundScheduler()
+
+def start_cron():
+    """Starts the scheduler running all cron jobs."""
+    scheduler.add_job(delete_expired_tokens, "interval", hours=24)
+    # The token blacklist mirror lives in each worker's memory, so every worker refreshes its own
+    scheduler.add_job(
+        refresh_token_blacklist_job,
+        "interval",
+        seconds=config["TOKEN_BLACKLIST_REFRESH_SECONDS"],
+        next_run_time=datetime.now()
+    )
+    scheduler.add_job(refresh_sales_rollup_job, "interval", minutes=config["SALES_ROLLUP_REFRESH_MINUTES"])
+    scheduler.add_job(
+        refresh_product_sync_job,
+        "interval",
+        minutes=config["PRODUCT_SYNC_REFRESH_MINUTES"],
+        next_run_time=datetime.now()
+    )
+    scheduler.add_job(
+        refresh_search_index_job,
+        "interval",
+        minutes=config["SEARCH_INDEX_REFRESH_MINUTES"],
+        next_run_time=datetime.now()
+    )
+    # The goods projections live in each worker's memory, so every worker refreshes its own
+    scheduler.add_job(
+        refresh_goods_projections_job,
+        "interval",
+        seconds=config["GOODS_PROJECTION_REFRESH_SECONDS"],
+        next_run_time=datetime.now()
+    )
+    scheduler.start()
+
+    logger.info("Cron jobs started.")
+
+def stop_cron():
+    """Stops the scheduler without waiting for running jobs."""
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,19 @@
+from sqlalchemy.orm import Session
+import logging
+
+from app.db.database import PostgresSessionLocal, MSSQLReadSessionLocal
+from app.services.search_index import refresh_search_index
+
+logger = logging.getLogger(__name__)
+
+def refresh_search_index_job():
+    """Copies product and partner names into the Postgres search index."""
+    pg_db: Session = PostgresSessionLocal()
+    mssql_db: Session = MSSQLReadSessionLocal()
+    try:
+        refresh_search_index(pg_db, mssql_db)
+    except Exception as e:
+        logger.error(f"Search index refresh failed: {e}")
+    finally:
+        pg_db.close()
+        mssql_db.close()
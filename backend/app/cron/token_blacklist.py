@@ -0,0 +1,17 @@
+from sqlalchemy.orm import Session
+import logging
+
+from app.cache.token_blacklist import token_blacklist_cache
+from app.db.database import PostgresSessionLocal
+
+logger = logging.getLogger(__name__)
+
+def refresh_token_blacklist_job():
+    """Reloads this worker's in-memory token blacklist, dropping expired tokens."""
+    db: Session = PostgresSessionLocal()
+    try:
+        token_blacklist_cache.load(db)
+    except Exception as e:
+        logger.error(f"Token blacklist refresh failed: {e}")
+    finally:
+        db.close()
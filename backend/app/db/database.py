@@ -1,19 +1,124 @@
 import pyodbc
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import config
+from app.db.pool_metrics import instrumented_pool_class
+from app.db.query_builder import use_fixed_string_parameter_sizes
+from app.db.query_metrics import instrument_engine
+from app.db.replicas import ReplicaRouter, routing_session_class
+
+
+def pool_options(prefix: str) -> dict:
+    """Returns the create_engine pool arguments configured under `prefix` (POSTGRES or MSSQL)."""
+    return {
+        "pool_size": config[f"{prefix}_POOL_SIZE"],
+        "max_overflow": config[f"{prefix}_MAX_OVERFLOW"],
+        "pool_timeout": config[f"{prefix}_POOL_TIMEOUT"],
+        "pool_recycle": config[f"{prefix}_POOL_RECYCLE"],
+        "pool_pre_ping": config[f"{prefix}_POOL_PRE_PING"],
+    }
+
 
 # PostgreSQL Configuration
 POSTGRESQL_DATABASE_URL = f"postgresql://postgres:{config['DB_PASSWORD']}@{config['DB_HOST']}/{config['DB_NAME']}"
-postgres_engine = create_engine(POSTGRESQL_DATABASE_URL)
+postgres_engine = create_engine(
+    POSTGRESQL_DATABASE_URL,
+    poolclass=instrumented_pool_class("postgres"),
+    **pool_options("POSTGRES")
+)
 PostgresSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=postgres_engine)
 
 # MSSQL Configuration
 MSSQL_DATABASE_URL = f"mssql+pyodbc://{config['MSSQL_USER']}:{config['MSSQL_PASSWORD']}@{config['MSSQL_SERVER']}/{config['MSSQL_DATABASE']}?driver={config['MSSQL_DRIVER']}&TrustServerCertificate=yes"
-mssql_engine = create_engine(MSSQL_DATABASE_URL)
+mssql_engine = create_engine(
+    MSSQL_DATABASE_URL,
+    poolclass=instrumented_pool_class("mssql"),
+    **pool_options("MSSQL")
+)
 MSSQLSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=mssql_engine)
 
+# Async variants of both engines, so a worker can wait on many queries at once
+POSTGRESQL_ASYNC_DATABASE_URL = f"postgresql+asyncpg://postgres:{config['DB_PASSWORD']}@{config['DB_HOST']}/{config['DB_NAME']}"
+async_postgres_engine = create_async_engine(
+    POSTGRESQL_ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool_class("postgres_async", AsyncAdaptedQueuePool),
+    **pool_options("POSTGRES")
+)
+AsyncPostgresSessionLocal = async_sessionmaker(autoflush=False, bind=async_postgres_engine, expire_on_commit=False)
+
+MSSQL_ASYNC_DATABASE_URL = f"mssql+aioodbc://{config['MSSQL_USER']}:{config['MSSQL_PASSWORD']}@{config['MSSQL_SERVER']}/{config['MSSQL_DATABASE']}?driver={config['MSSQL_DRIVER']}&TrustServerCertificate=yes"
+async_mssql_engine = create_async_engine(
+    MSSQL_ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool_class("mssql_async", AsyncAdaptedQueuePool),
+    **pool_options("MSSQL")
+)
+AsyncMSSQLSessionLocal = async_sessionmaker(autoflush=False, bind=async_mssql_engine, expire_on_commit=False)
+
+def get_pool_metrics() -> list[dict]:
+    """Returns the checkout metrics and current usage of every connection pool."""
+    return [
+        engine.pool.metrics.snapshot(engine.pool)
+        for engine in (
+            postgres_engine,
+            mssql_engine,
+            async_postgres_engine.sync_engine,
+            async_mssql_engine.sync_engine,
+            *mssql_replica_engines,
+            *[engine.sync_engine for engine in async_mssql_replica_engines],
+        )
+    ]
+
+# Read-only MSSQL replicas. Read sessions are routed round-robin to a healthy replica,
+# or to the primary if there is none. Writes and user mapping validation use the primary.
+MSSQL_REPLICA_URLS = [url.strip() for url in config["MSSQL_REPLICA_URLS"].split(",") if url.strip()]
+mssql_replica_engines = [
+    create_engine(url, poolclass=instrumented_pool_class(f"mssql_replica_{index}"), **pool_options("MSSQL"))
+    for index, url in enumerate(MSSQL_REPLICA_URLS)
+]
+async_mssql_replica_engines = [
+    create_async_engine(
+        make_url(url).set(drivername="mssql+aioodbc"),
+        poolclass=instrumented_pool_class(f"mssql_replica_{index}_async", AsyncAdaptedQueuePool),
+        **pool_options("MSSQL")
+    )
+    for index, url in enumerate(MSSQL_REPLICA_URLS)
+]
+
+for engine in (mssql_engine, async_mssql_engine, *mssql_replica_engines, *async_mssql_replica_engines):
+    use_fixed_string_parameter_sizes(getattr(engine, "sync_engine", engine))
+
+# Statement timings, row counts, round trips per request and the slow-query log, labelled like the pools
+for engine in (
+    postgres_engine,
+    mssql_engine,
+    async_postgres_engine.sync_engine,
+    async_mssql_engine.sync_engine,
+    *mssql_replica_engines,
+    *[engine.sync_engine for engine in async_mssql_replica_engines],
+):
+    instrument_engine(engine, engine.pool.metrics.name, config["SLOW_QUERY_MS"] / 1000)
+
+mssql_read_router = ReplicaRouter(mssql_engine, mssql_replica_engines, config["MSSQL_REPLICA_RETRY_SECONDS"])
+MSSQLReadSessionLocal = sessionmaker(
+    class_=routing_session_class(mssql_read_router),
+    autocommit=False,
+    autoflush=False
+)
+
+async_mssql_read_router = ReplicaRouter(
+    async_mssql_engine.sync_engine,
+    [engine.sync_engine for engine in async_mssql_replica_engines],
+    config["MSSQL_REPLICA_RETRY_SECONDS"]
+)
+AsyncMSSQLReadSessionLocal = async_sessionmaker(
+    sync_session_class=routing_session_class(async_mssql_read_router),
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base for models
 Base = declarative_base()
 
@@ -32,3 +137,18 @@ def get_mssql_db():
         yield db
     finally:
         db.close()
+
+# Async dependency for PostgreSQL
+async def get_async_postgres_db():
+    async with AsyncPostgresSessionLocal() as db:
+        yield db
+
+# Async dependency for MSSQL
+async def get_async_mssql_db():
+    async with AsyncMSSQLSessionLocal() as db:
+        yield db
+
+# Async dependency for read-only MSSQL queries (routed to a replica)
+async def get_async_mssql_read_db():
+    async with AsyncMSSQLReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from app.db.database import postgres_engine
+
+# Keys of the Postgres advisory locks which keep workers from running the same job concurrently
+SALES_ROLLUP_LOCK_KEY = 4_210_001
+PRODUCT_SYNC_LOCK_KEY = 4_210_002
+SEARCH_INDEX_LOCK_KEY = 4_210_003
+
+
+@contextmanager
+def try_advisory_lock(key: int):
+    """
+    Tries to take a Postgres advisory lock and yields whether it was acquired.
+    Session-level advisory locks belong to a connection, so one is held until the block exits.
+    """
+    with postgres_engine.connect() as lock_connection:
+        acquired = lock_connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Checkout counters of one connection pool, shared by every pool an engine recreates."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.waits = 0  # checkouts which found no idle connection and no overflow room
+        self.timeouts = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, seconds: float, waited: bool, timed_out: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.waits += waited
+            self.timeouts += timed_out
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        """Returns the counters together with the current size and usage of `pool`."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "pool_size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                # QueuePool counts overflow from -pool_size, so only the positive part is overflow
+                "overflow": max(pool.overflow(), 0),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "checkout_seconds_avg": self.checkout_seconds_total / self.checkouts if self.checkouts else 0.0,
+                "checkout_seconds_max": self.checkout_seconds_max,
+            }
+
+
+def instrumented_pool_class(name: str, base: type[QueuePool] = QueuePool) -> type[QueuePool]:
+    """
+    Returns a subclass of `base` which records how long each connection checkout takes.
+    The metrics live on the class, so they survive `engine.dispose()` recreating the pool.
+    """
+    metrics = PoolMetrics(name)
+
+    def _do_get(self):
+        # Every connection in use and no overflow room left, so the checkout has to wait
+        waited = self.checkedin() == 0 and 0 <= self._max_overflow <= self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except PoolTimeoutError:
+            metrics.record_checkout(time.perf_counter() - started, waited, timed_out=True)
+            raise
+        metrics.record_checkout(time.perf_counter() - started, waited, timed_out=False)
+        return connection
+
+    # Keeping the module of `base` keeps the pool's log records under the sqlalchemy.pool logger
+    return type(base.__name__, (base,), {"__module__": base.__module__, "metrics": metrics, "_do_get": _do_get})
@@ -0,0 +1,107 @@
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from sqlalchemy import Integer, String, Unicode, bindparam, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.types import TypeEngine
+
+# Parameter types shared by the list queries. Strings are bound with a fixed length (see
+# `use_fixed_string_parameter_sizes`), otherwise every value length gets its own MSSQL plan.
+INTEGER_PARAM = Integer()
+STRING_PARAM = Unicode(255)
+
+# SQL Server accepts at most 2100 parameters per statement, so ID lists are sent in chunks
+MAX_IDS_PER_QUERY = 1000
+
+_PARAMETER_NAME = re.compile(r"(?<!:):(\w+)")
+
+
+class QueryTemplate:
+    """
+    A SELECT with optional filters which compiles to one canonical, cached statement per
+    combination of active filters. Filters are always applied in the order they are declared,
+    so the same combination always produces the same SQL text and MSSQL can reuse its plan.
+    With `columns` (name -> SQL expression), `select` has a `{columns}` placeholder and
+    a statement can select a subset of the columns, which are also kept in declaration order.
+    `expanding` parameters take lists (`ID IN :ids`); pass them through `pad_ids`.
+    """
+
+    def __init__(
+        self,
+        select: str,
+        filters: list[tuple[str, str]],
+        param_types: dict[str, TypeEngine],
+        columns: Optional[dict[str, str]] = None,
+        expanding: tuple[str, ...] = ()
+    ):
+        self.select = select
+        self.filters = filters  # (name, condition) in their fixed order
+        self.param_types = param_types
+        self.columns = columns
+        self.expanding = expanding
+        # Bounded by the number of filter, column and suffix combinations actually requested
+        self._statement = lru_cache(maxsize=1024)(self._build)
+
+    def statement(self, params: dict, suffix: str = "", fields: Optional[Iterable[str]] = None) -> TextClause:
+        """
+        Returns the statement for the filters whose parameter in `params` is not None,
+        selecting only the `fields` columns if given (names which are not columns are ignored).
+        """
+        return self._statement(self._active(params), suffix, counted=False, fields=self._selected(fields))
+
+    def count_statement(self, params: dict) -> TextClause:
+        """Returns a COUNT(*) of the rows the same filters match."""
+        return self._statement(self._active(params), "", counted=True, fields=None)
+
+    def _active(self, params: dict) -> tuple[str, ...]:
+        return tuple(name for name, _ in self.filters if params.get(name) is not None)
+
+    def _selected(self, fields: Optional[Iterable[str]]) -> Optional[tuple[str, ...]]:
+        if fields is None or self.columns is None:
+            return None
+        fields = set(fields)
+        return tuple(name for name in self.columns if name in fields)
+
+    def _build(self, active: tuple[str, ...], suffix: str, counted: bool, fields: Optional[tuple[str, ...]]) -> TextClause:
+        sql = self.select
+        if self.columns is not None:
+            columns = self.columns if fields is None else {name: self.columns[name] for name in fields}
+            sql = sql.replace("{columns}", ", ".join(f"{expression} AS {name}" for name, expression in columns.items()))
+        sql += "".join(f" AND {condition}" for name, condition in self.filters if name in active)
+        sql = f"SELECT COUNT(*) FROM ({sql}) AS counted" if counted else sql + suffix
+        names = set(_PARAMETER_NAME.findall(sql))
+        return text(sql).bindparams(*[
+            bindparam(name, type_=type_, expanding=name in self.expanding)
+            for name, type_ in self.param_types.items() if name in names
+        ])
+
+
+def pad_ids(ids: list[int]) -> list[int]:
+    """
+    Pads an ID list for an expanding IN to the next power of two by repeating its last ID.
+    Each list length is its own SQL text to MSSQL, so this keeps it to a handful of plans.
+    """
+    if not ids:
+        return ids
+    size = 1 << (len(ids) - 1).bit_length()
+    return ids + [ids[-1]] * (size - len(ids))
+
+
+def active_params(params: dict) -> dict:
+    """Drops the parameters of inactive (None) filters."""
+    return {name: value for name, value in params.items() if value is not None}
+
+
+def use_fixed_string_parameter_sizes(engine: Engine):
+    """
+    Makes pyodbc bind length-typed string parameters as NVARCHAR(length) instead of
+    NVARCHAR(len(value)), so the value length no longer produces a new MSSQL plan.
+    """
+
+    @event.listens_for(engine, "do_setinputsizes")
+    def fix_string_sizes(inputsizes, cursor, statement, parameters, context):
+        for param, dbtype in list(inputsizes.items()):
+            if isinstance(param.type, String) and param.type.length and not isinstance(dbtype, tuple):
+                inputsizes[param] = (dbtype, param.type.length, 0)
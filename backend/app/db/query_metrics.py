@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.prometheus import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Statements beyond this many distinct ones are counted together as "other", so the series stay bounded
+MAX_TRACKED_STATEMENTS = 200
+# Expanded IN lists ("IN (?, ?, ?)") differ only in their length, so they count as one statement
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|\$\d+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds", "Time spent executing each statement.", ("engine", "statement")
+)
+STATEMENT_ROWS = Counter(
+    "db_statement_rows_total", "Rows returned or affected, as far as the driver reports them.", ("engine", "statement")
+)
+
+
+class RequestQueryStats:
+    """Database round trips of one request, collected while it is handled."""
+
+    __slots__ = ("round_trips", "seconds", "rows")
+
+    def __init__(self):
+        self.round_trips = 0
+        self.seconds = 0.0
+        self.rows = 0
+
+
+# Set by the timing middleware. Sync routes run in a copy of the context and async sessions
+# run their statements in a greenlet sharing it, so both update the same object.
+request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+class StatementCatalog:
+    """Maps statement fingerprints (the `statement` label) to their normalized SQL."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._statements: dict[str, str] = {}
+        self._fingerprints: dict[str, str] = {}  # raw statement -> fingerprint, so each is normalized once
+        self._lock = threading.Lock()
+
+    def fingerprint(self, statement: str) -> str:
+        fingerprint = self._fingerprints.get(statement)
+        if fingerprint is not None:
+            return fingerprint
+
+        normalized = _PLACEHOLDER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+        fingerprint = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+        with self._lock:
+            if fingerprint not in self._statements:
+                if len(self._statements) >= self.max_size:
+                    fingerprint = "other"
+                else:
+                    self._statements[fingerprint] = normalized
+            if len(self._fingerprints) < self.max_size * 10:
+                self._fingerprints[statement] = fingerprint
+        return fingerprint
+
+    def statements(self) -> dict[str, str]:
+        with self._lock:
+            return dict(self._statements)
+
+
+statement_catalog = StatementCatalog(MAX_TRACKED_STATEMENTS)
+
+
+def instrument_engine(engine: Engine, name: str, slow_query_seconds: float):
+    """
+    Times every statement `engine` executes: a latency histogram and row counter per statement,
+    the round trips of the current request, and a warning for statements slower than `slow_query_seconds`.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        started_at = getattr(context, "query_started_at", None)
+        if started_at is None:
+            return
+        seconds = time.perf_counter() - started_at
+        # SELECTs on pyodbc report -1 until the rows are fetched
+        rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+
+        labels = (name, statement_catalog.fingerprint(statement))
+        STATEMENT_SECONDS.observe(seconds, labels)
+        if rows is not None:
+            STATEMENT_ROWS.inc(labels, rows)
+
+        stats = request_query_stats.get()
+        if stats is not None:
+            stats.round_trips += 1
+            stats.seconds += seconds
+            stats.rows += rows or 0
+
+        if seconds >= slow_query_seconds:
+            logger.warning(
+                f"Slow query on {name} ({seconds * 1000:.0f} ms, "
+                f"{'unknown' if rows is None else rows} rows, statement {labels[1]}): {_WHITESPACE.sub(' ', statement)[:2000]}"
+            )
@@ -0,0 +1,65 @@
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """
+    Hands out read-only replica engines round-robin, skipping replicas that recently failed.
+    Falls back to the primary engine if no replica is configured or healthy.
+    """
+
+    def __init__(self, primary: Engine, replicas: list[Engine], retry_seconds: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.retry_seconds = retry_seconds
+        self._unhealthy_until: dict[Engine, float] = {}  # replica -> monotonic time it is retried at
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        for replica in replicas:
+            event.listen(replica, "handle_error", self._error_listener(replica))
+
+    def choose(self) -> Engine:
+        now = time.monotonic()
+        with self._lock:
+            healthy = [replica for replica in self.replicas if self._unhealthy_until.get(replica, 0) <= now]
+        if not healthy:
+            return self.primary
+        return healthy[next(self._counter) % len(healthy)]
+
+    def mark_unhealthy(self, replica: Engine):
+        with self._lock:
+            self._unhealthy_until[replica] = time.monotonic() + self.retry_seconds
+        logger.warning(f"MSSQL replica {replica.url.host} is unhealthy, skipping it for {self.retry_seconds}s.")
+
+    def _error_listener(self, replica: Engine):
+        def on_error(context):
+            # Lost connections and failed connects take the replica out of rotation, query errors do not
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+                self.mark_unhealthy(replica)
+        return on_error
+
+
+def routing_session_class(router: ReplicaRouter) -> type[Session]:
+    """
+    Returns a Session class which binds each session to one engine chosen by `router`,
+    so every statement of a request reads from the same replica.
+    """
+
+    class ReplicaSession(Session):
+        def get_bind(self, mapper=None, clause=None, **kwargs):
+            bind = self.info.get("replica_bind")
+            if bind is None:
+                bind = self.info["replica_bind"] = router.choose()
+            return bind
+
+    return ReplicaSession
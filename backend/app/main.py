@@ -2,12 +2,20 @@ from fastapi import FastAPI
 from app.routes.auth import router as auth_router
 from app.routes.users import router as users_router
 from app.routes.roles import router as roles_router
+from app.routes.metrics import router as metrics_router, prometheus_router
 from app.routes.microinvest.products import router as microinvest_products_router
+from app.routes.microinvest.product_sync import router as microinvest_product_sync_router
+from app.routes.microinvest.product_lookup import router as microinvest_product_lookup_router
 from app.routes.microinvest.partners import router as microinvest_partners_router
 from app.routes.microinvest.users import router as microinvest_users_router
 from app.routes.microinvest.operations import router as microinvest_operations_router
 from app.routes.microinvest.dashboard import router as microinvest_dashboard_router
-from app.cron.cleanup_blacklist import start_cron
+from app.routes.microinvest.search import router as microinvest_search_router
+from app.cron.scheduler import start_cron, stop_cron
+from app.cache.token_blacklist import token_blacklist_cache
+from app.config import config
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.timing import TimingMiddleware
 
 app = FastAPI(
     title="Distributor API",
@@ -15,17 +23,48 @@ app = FastAPI(
     version="1.0.0"
 )
 
+if config["COMPRESSION_ENABLED"]:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config["COMPRESSION_MINIMUM_SIZE"],
+        gzip_level=config["COMPRESSION_GZIP_LEVEL"],
+        brotli_quality=config["COMPRESSION_BROTLI_QUALITY"]
+    )
+
+# Added last, so it is outermost and its timings include compression
+if config["REQUEST_TIMING_ENABLED"]:
+    app.add_middleware(TimingMiddleware, server_timing=config["SERVER_TIMING_ENABLED"])
+
 
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(roles_router)
 app.include_router(microinvest_products_router)
+app.include_router(microinvest_product_sync_router)
+app.include_router(microinvest_product_lookup_router)
 app.include_router(microinvest_partners_router)
 app.include_router(microinvest_users_router)
 app.include_router(microinvest_operations_router)
 app.include_router(microinvest_dashboard_router)
+app.include_router(microinvest_search_router)
+app.include_router(metrics_router)
+app.include_router(prometheus_router)
+
+@app.on_event("startup")
+def start_background_jobs():
+    # Started on startup rather than at import, so importing the app does no database I/O
+    start_cron()
+
+
+@app.on_event("startup")
+def start_token_blacklist_listener():
+    token_blacklist_cache.start_listener()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    stop_cron()
 
-start_cron()
 
 @app.get("/")
 def home():
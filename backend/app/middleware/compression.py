@@ -0,0 +1,159 @@
+import zlib
+from typing import Optional
+
+from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional; without it responses are only gzip-compressed
+    brotli = None
+
+# Content types which are already compressed, so compressing them again only costs CPU
+INCOMPRESSIBLE_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def disable_compression(request: Request):
+    """Route dependency opting a route out of response compression: `dependencies=[Depends(disable_compression)]`."""
+    request.state.compress = False
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool) -> Optional[str]:
+    """Returns "br" or "gzip" as accepted by the client (brotli preferred on equal q values), or None."""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    wildcard = qualities.get("*", 0.0)
+    ranked = [(qualities.get(coding, wildcard), coding) for coding in candidates]
+    quality, coding = max(ranked, key=lambda ranked_coding: ranked_coding[0])
+    return coding if quality > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, as negotiated through Accept-Encoding.
+    - Complete bodies smaller than `minimum_size` are sent as they are.
+    - Streaming bodies are compressed chunk by chunk and flushed after each chunk,
+      so they are never buffered in full.
+    - Routes can opt out with the `disable_compression` dependency.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), brotli is not None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressedResponder(self, scope, encoding, send).run(receive)
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: str, send: Send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def run(self, receive: Receive):
+        await self.middleware.app(self.scope, receive, self.send_compressed)
+
+    def _should_compress(self, headers: Headers) -> bool:
+        if self.scope.get("state", {}).get("compress") is False:
+            return False
+        if "content-encoding" in headers:
+            return False
+        return not headers.get("content-type", "").startswith(INCOMPRESSIBLE_CONTENT_TYPES)
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether the response is worth compressing
+            self.start_message = message
+            self.passthrough = not self._should_compress(Headers(raw=message["headers"]))
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self._send_start()
+                await self.send(message)
+                return
+
+            self.compressor = self._new_compressor()
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            # The compressed body is a different representation, so a strong ETag becomes weak
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            if not more_body:
+                compressed = self._compress(body) + self._finish()
+                headers["Content-Length"] = str(len(compressed))
+                await self._send_start()
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send_start()
+
+        if more_body:
+            await self.send({"type": "http.response.body", "body": self._compress(body) + self._flush(), "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": self._compress(body) + self._finish()})
+
+    async def _send_start(self):
+        message, self.start_message = self.start_message, None
+        if message is not None:
+            await self.send(message)
+
+    def _new_compressor(self):
+        if self.encoding == "br":
+            return brotli.Compressor(quality=self.middleware.brotli_quality)
+        # wbits 16 + 15 writes the gzip header and trailer
+        return zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def _compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data) if self.encoding == "br" else self.compressor.compress(data)
+
+    def _flush(self) -> bytes:
+        return self.compressor.flush() if self.encoding == "br" else self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def _finish(self) -> bytes:
+        return self.compressor.finish() if self.encoding == "br" else self.compressor.flush()
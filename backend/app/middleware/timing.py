@@ -0,0 +1,80 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.query_metrics import RequestQueryStats, request_query_stats
+from app.prometheus import Histogram
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body, per route.", ("method", "route", "status")
+)
+REQUEST_ROUND_TRIPS = Histogram(
+    "http_request_db_round_trips", "Database statements executed per request.", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100)
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_duration_seconds", "Time spent in database statements per request.", ("method", "route")
+)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Returns the path template of the route which handled the request (e.g. "/microinvest/products/"),
+    so per-route series do not grow with path parameters. Unmatched requests are "unmatched".
+    """
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+    templates = getattr(app.state, "route_templates", None)
+    if templates is None:
+        templates = {}
+        for route in app.routes:
+            templates.setdefault(getattr(route, "endpoint", None), getattr(route, "path", "unmatched"))
+        app.state.route_templates = templates
+    return templates.get(endpoint, "unmatched")
+
+
+class TimingMiddleware:
+    """
+    Times every request and counts the database round trips it makes, per route.
+    With `server_timing`, the totals are also sent to the client in a `Server-Timing` header.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        stats = RequestQueryStats()
+        token = request_query_stats.set(stats)
+        status = 500
+
+        async def send_timed(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    # Known once the route has run; a streamed body is still being produced
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.round_trips} queries", '
+                        f"app;dur={(time.perf_counter() - started_at) * 1000:.1f}"
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            request_query_stats.reset(token)
+            method, route = scope["method"], route_template(scope)
+            REQUEST_SECONDS.observe(time.perf_counter() - started_at, (method, route, str(status)))
+            REQUEST_ROUND_TRIPS.observe(stats.round_trips, (method, route))
+            REQUEST_DB_SECONDS.observe(stats.seconds, (method, route))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Date, DateTime, Float, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -53,5 +53,64 @@ class UserMapping(Base):
     user = relationship("User", back_populates="mapping")
 
 
+class SalesDailyRollup(Base):
+    """Microinvest sales pre-aggregated per day, user, partner and good."""
+    __tablename__ = "sales_daily_rollup"
 
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    user_id = Column(Integer, nullable=True)  # Microinvest user ID
+    partner_id = Column(Integer, nullable=True)  # Microinvest partner ID
+    partner_name = Column(String, nullable=True)
+    good_id = Column(Integer, nullable=True)  # Microinvest good ID
+    good_name = Column(String, nullable=True)
+    total_sales = Column(Integer, nullable=False)
+    total_quantity = Column(Float, nullable=False)
+    total_revenue = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sales_daily_rollup_day_user_id", "day", "user_id"),
+    )
+
+
+class RollupState(Base):
+    """Tracks which days (both bounds inclusive) a rollup table is complete for."""
+    __tablename__ = "rollup_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)  # e.g. 'sales_daily_rollup'
+    rolled_up_from = Column(Date, nullable=False)
+    rolled_up_to = Column(Date, nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class ProductSyncState(Base):
+    """Content hash and change version of every Microinvest good, used for catalog delta sync."""
+    __tablename__ = "product_sync_state"
+
+    good_id = Column(Integer, primary_key=True, autoincrement=False)  # Microinvest good ID
+    content_hash = Column(String, nullable=False)
+    version = Column(BigInteger, nullable=False, index=True)  # Sync run in which the good last changed
+    deleted = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class SearchEntry(Base):
+    """Searchable names, codes and barcodes of Microinvest products and partners."""
+    __tablename__ = "search_entries"
+
+    kind = Column(String(16), primary_key=True)  # 'product' or 'partner'
+    entity_id = Column(Integer, primary_key=True, autoincrement=False)  # Microinvest good/partner ID
+    search_text = Column(String, nullable=False)  # Lower-cased name, codes and other searchable fields
+    codes = Column(String, nullable=False)  # Lower-cased codes matched exactly (code, barcodes, tax numbers)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # Trigram index answering substring (LIKE '%x%') and similarity searches
+        Index(
+            "ix_search_entries_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"}
+        ),
+    )
@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from app.commons import return_http_400_response
+
+
+def encode_cursor(*values) -> str:
+    """Encodes the sort key of the last returned row into an opaque continuation token."""
+    # Datetimes keep millisecond precision, the precision of SQL Server DATETIME columns
+    payload = json.dumps(
+        [value.isoformat(timespec="milliseconds") if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decodes a continuation token created by `encode_cursor` into its `size` values."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        return return_http_400_response("Invalid cursor!")
+    return values
+
+
+def decode_operation_cursor(cursor: str) -> tuple[str, int]:
+    """
+    Decodes an operations continuation token into its (Date, ID) pair.
+    The date is returned as an ISO string, so SQL Server converts it to the column's own type.
+    """
+    operation_date, operation_id = decode_cursor(cursor, 2)
+    try:
+        datetime.fromisoformat(operation_date)
+        return operation_date, int(operation_id)
+    except (TypeError, ValueError):
+        return return_http_400_response("Invalid cursor!")
+
+
+def decode_sync_token(sync_token: str) -> tuple[int, int]:
+    """Decodes a catalog sync token into its (version, good ID) position."""
+    version, good_id = decode_cursor(sync_token, 2)
+    if not isinstance(version, int) or not isinstance(good_id, int):
+        return return_http_400_response("Invalid sync token!")
+    return version, good_id
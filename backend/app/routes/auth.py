@@ -7,6 +7,7 @@ from jose import jwt
 from passlib.context import CryptContext
 
 from app import models, utils
+from app.cache.token_blacklist import token_blacklist_cache
 from app.schemas import token, user
 from app.db import database
 from app.utils import get_current_user, oauth2_scheme
@@ -82,5 +83,7 @@ def logout(
     
     db_token = models.TokenBlacklist(token=token)
     db.add(db_token)
+    token_blacklist_cache.publish(token, db)
     db.commit()
+    token_blacklist_cache.add(token)
     return {"message": "Successfully logged out"}
@@ -0,0 +1,98 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from app.cache.barcode_index import barcode_index
+from app.cache.price_projection import price_projection
+from app.cache.record_counts import record_count_cache
+from app.cache.response_cache import response_cache
+from app.cache.user_mapping import user_mapping_cache
+from app.config import config
+from app.constants import RoleName
+from app.db.database import get_pool_metrics
+from app.db.query_metrics import STATEMENT_ROWS, STATEMENT_SECONDS, statement_catalog
+from app.middleware.timing import REQUEST_DB_SECONDS, REQUEST_ROUND_TRIPS, REQUEST_SECONDS
+from app import prometheus
+from app.models import User
+from app.utils import get_current_user
+
+router = APIRouter(prefix="/internal/metrics", tags=["Internal - Metrics"])
+# Scraped by Prometheus, which authenticates with METRICS_TOKEN rather than a user login
+prometheus_router = APIRouter(tags=["Internal - Metrics"])
+
+
+@router.get("/pools")
+def get_connection_pool_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Returns checkout latency, wait and timeout counters and the in-use gauges of every
+    database connection pool (Admin/Superuser only).
+    """
+
+    if not (current_user.is_superuser or current_user.role.name == RoleName.ADMIN):
+        raise HTTPException(status_code=403, detail="You do not have permission to view metrics.")
+
+    return {"pools": get_pool_metrics()}
+
+
+@router.get("/caches")
+def get_cache_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Returns the hit/miss counters and sizes of the in-process caches (Admin/Superuser only)."""
+
+    if not (current_user.is_superuser or current_user.role.name == RoleName.ADMIN):
+        raise HTTPException(status_code=403, detail="You do not have permission to view metrics.")
+
+    return {
+        "user_mapping": user_mapping_cache.stats(),
+        "record_count": record_count_cache.stats(),
+        "response": response_cache.stats(),
+        "barcode_index": barcode_index.stats(),
+        "price_projection": price_projection.stats(),
+    }
+
+
+@router.get("/queries")
+def get_query_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Returns the SQL of each statement fingerprint used as the `statement` label in /metrics (Admin/Superuser only)."""
+
+    if not (current_user.is_superuser or current_user.role.name == RoleName.ADMIN):
+        raise HTTPException(status_code=403, detail="You do not have permission to view metrics.")
+
+    return {"statements": statement_catalog.statements()}
+
+
+@prometheus_router.get("/metrics", include_in_schema=False)
+def get_prometheus_metrics(request: Request):
+    """
+    Returns request latencies, database round trips per request, statement timings and
+    connection pool usage in the Prometheus text format.
+    Requires `Authorization: Bearer <METRICS_TOKEN>`; disabled (503) while METRICS_TOKEN is not set.
+    """
+    token = config["METRICS_TOKEN"]
+    if not token:
+        raise HTTPException(status_code=503, detail="Metrics are disabled, METRICS_TOKEN is not set.")
+    if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token.")
+
+    pools = get_pool_metrics()
+    lines = []
+    for metric in (REQUEST_SECONDS, REQUEST_ROUND_TRIPS, REQUEST_DB_SECONDS, STATEMENT_SECONDS, STATEMENT_ROWS):
+        lines += metric.render()
+    lines += prometheus.sample_lines(
+        "db_pool_checked_out", "Connections currently checked out.", "gauge", ("pool",),
+        [((pool["name"],), pool["checked_out"]) for pool in pools]
+    )
+    lines += prometheus.sample_lines(
+        "db_pool_checkout_waits_total", "Checkouts which had to wait for a connection.", "counter", ("pool",),
+        [((pool["name"],), pool["waits"]) for pool in pools]
+    )
+    lines += prometheus.sample_lines(
+        "db_pool_checkout_timeouts_total", "Checkouts which timed out.", "counter", ("pool",),
+        [((pool["name"],), pool["timeouts"]) for pool in pools]
+    )
+    return Response(content=prometheus.render(lines), media_type="text/plain; version=0.0.4")
@@ -1,11 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import commons
+from app.cache.record_counts import count_records
+from app.columnar import columnar_response, negotiate_columnar_format
 from app.constants import OperationQueryParams
-from app.schemas.operations import OperationApiResponse, OperationResponse
-from app.db.database import get_mssql_db
+from app.pagination import encode_cursor, decode_operation_cursor
+from app.schemas.batch import BatchRequest
+from app.serialization import json_response
+from app.schemas.operations import OperationApiResponse, OperationBatchResponse, OperationResponse
+from app.db.database import get_async_mssql_read_db
+from app.services.operations import (
+    OPERATIONS_EXPORT_ORDER,
+    OPERATIONS_PAGE_ORDER,
+    OPERATIONS_QUERY,
+    OPERATION_SERIALIZER,
+    fetch_operations_by_ids,
+    operation_columns,
+    operation_filter_params,
+    operation_to_dict,
+    stream_operations,
+    to_operation_response,
+)
 from app.utils import get_current_user_with_mapping
 from app.commons import validate_start_date_before_end_date, is_superuser_based_on_user_level
 from app.models import UserMapping
@@ -15,8 +34,9 @@ router = APIRouter(prefix="/microinvest/operations", tags=["Microinvest - Operat
 
 
 @router.get("/", response_model=OperationApiResponse, response_model_exclude_none=True)
-def get_operations(
-    db: Session = Depends(get_mssql_db),
+async def get_operations(
+    request: Request,
+    db: AsyncSession = Depends(get_async_mssql_read_db),
     current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
     user_id: Optional[int] = Query(None, description="Filter by User ID"),
     partner_id: Optional[int] = Query(None, description="Filter by Partner ID"),
@@ -28,123 +48,173 @@ def get_operations(
     start_date: Optional[str] = Query(None, description="Filter from Date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="Filter to Date (YYYY-MM-DD)"),
     limit: int = Query(50, description="Limit the number of results", gt=0),
-    offset: int = Query(0, description="Offset for pagination", ge=0)
+    offset: int = Query(0, description="Offset for pagination", ge=0),
+    cursor: Optional[str] = Query(None, description="Continuation token from `next_cursor` (used instead of offset)")
 ):
     """
     Retrieves operations (sales/purchases) from Microinvest.
     - If the user is an admin, they get all operations.
     - If the user is not an admin, they only get their own operations.
     - Supports filtering by user (Only for admin/staff), partner, good, operation type, and date range.
-    - Supports pagination.
-    """
-
-    query = """
-        SELECT
-            u.Name AS user_name,
-            p.Company AS partner_name,
-            GoodID AS good_id,
-            g.Name AS good_name,
-            ot.BG AS operation_name,
-            o.ID AS operation_id,
-            o.OperType AS operation_type,
-            o.UserID AS user_id,
-            o.PartnerID AS partner_id,
-            o.Date AS operation_date,
-            o.Qtty AS operation_qtty,
-            o.PriceOut AS price_out,
-            o.PriceIn AS price_in
-        FROM dbo.Operations o
-        LEFT JOIN dbo.Users u ON o.UserID = u.ID
-        LEFT JOIN dbo.Partners p ON o.PartnerID = p.ID
-        LEFT JOIN dbo.Goods g ON o.GoodID = g.ID
-        LEFT JOIN dbo.OperationType ot ON o.OperType = ot.ID
-        WHERE 1=1
-        AND ot.BG IS NOT NULL
+    - Supports offset pagination and cursor (keyset) pagination through `next_cursor`.
+    - `total_records` is the number of operations matching the filters, not the page size.
+    - Send `Accept: application/vnd.apache.arrow.stream` or `application/msgpack` to get the
+      operations column by column instead of one JSON object per row.
     """
-    params = {}
 
     # Validate start date is before end date
     if start_date and end_date:
         validate_start_date_before_end_date(start_date, end_date)
 
-    # Apply filtering for non-admin users
-    if not is_superuser_based_on_user_level(current_user_mapping.user_level):
-        query += " AND o.UserID = :current_user_id"
-        params["current_user_id"] = current_user_mapping.microinvest_user_id
-
     if not any([oper_type, oper_name, good_id, good_name, partner_id, partner_name]):
         return commons.return_http_400_response(f"At least one query should be provided: {f', '.join(OperationQueryParams.values())}")
 
-    # Apply filters
-    if user_id and is_superuser_based_on_user_level(current_user_mapping.user_level):
-        query += " AND o.UserID = :user_id"
-        params["user_id"] = user_id
-    if partner_id:
-        query += " AND o.PartnerID = :partner_id"
-        params["partner_id"] = partner_id
-    if partner_name:
-        query += " AND p.Company = :partner_name"
-        params["partner_name"] = partner_name
-    if good_id:
-        query += " AND o.GoodID = :good_id"
-        params["good_id"] = good_id
-    if good_name:
-        query += " AND g.Name= :good_name"
-        params["good_name"] = good_name
-    if oper_type:
-        query += " AND o.OperType = :oper_type"
-        params["oper_type"] = oper_type
-    if oper_name:
-        query += " AND ot.BG = :oper_name"
-        params["oper_name"] = oper_name
-    if start_date:
-        query += " AND o.Date >= :start_date"
-        params["start_date"] = start_date
-    if end_date:
-        query += " AND o.Date <= :end_date"
-        params["end_date"] = end_date
+    columnar_format = negotiate_columnar_format(request)
+
+    params = operation_filter_params(
+        current_user_mapping,
+        user_id=user_id,
+        partner_id=partner_id,
+        partner_name=partner_name,
+        good_id=good_id,
+        good_name=good_name,
+        oper_type=oper_type,
+        oper_name=oper_name,
+        start_date=start_date,
+        end_date=end_date
+    )
+    count_statement, count_params = OPERATIONS_QUERY.count_statement(params), dict(params)
+
+    # Cursor pagination seeks past the last returned (Date, ID) instead of skipping rows
+    if cursor:
+        params["cursor_date"], params["cursor_id"] = decode_operation_cursor(cursor)
+        offset = 0
 
     # # Add pagination
-    query += " ORDER BY Date DESC OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
     params["limit"] = limit
     params["offset"] = offset
     try:
-        result = db.execute(text(query), params)
-        operations = result.fetchall()
-
-        # Convert query results to response model
-        return {
-            "page": offset,
-            "limit": limit,
-            "total_records": len(operations),
-            "operations": [
-                OperationResponse(
-                    operation_id=row.operation_id,
-                    operation_type=row.operation_type,
-                    operation_name=row.operation_name,
-                    operation_date=row.operation_date,
-                    operation_qtty=row.operation_qtty,
-                    user_id=row.user_id,
-                    user_name=row.user_name,
-                    partner_id=row.partner_id,
-                    partner_name=row.partner_name,
-                    good_id=row.good_id,
-                    good_name=row.good_name,
-                    price_out=row.price_out,
-                    price_in=row.price_in if is_superuser_based_on_user_level(current_user_mapping.user_level) else None  # Hide PriceIn for non-admins
-                )
-                for row in operations
-            ]
-        }
+        result = await db.execute(OPERATIONS_QUERY.statement(params, OPERATIONS_PAGE_ORDER), params)
+        operations = result.mappings().all()
+        total_records = await count_records(db, "operations", count_statement, count_params)
+
+        next_cursor = None
+        if len(operations) == limit:
+            next_cursor = encode_cursor(operations[-1].operation_date, operations[-1].operation_id)
+
+        is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+        meta = {"page": offset, "limit": limit, "total_records": total_records, "next_cursor": next_cursor}
+        if columnar_format:
+            return columnar_response(
+                columnar_format, OPERATION_SERIALIZER, meta, "operations", operation_columns(operations, is_superuser)
+            )
+
+        # Rows are serialized straight to JSON; None fields are left out, as with response_model_exclude_none
+        response = {**meta, "operations": [operation_to_dict(row, is_superuser) for row in operations]}
+        return json_response({name: value for name, value in response.items() if value is not None}, headers={"Vary": "Accept"})
 
     except Exception as e:
         return commons.return_http_400_response(f'An error occurred: {e}')
 
 
+@router.get("/export")
+async def export_operations(
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
+    start_date: str = Query(..., description="Export from Date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Export to Date (YYYY-MM-DD)"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="'ndjson' or 'csv'"),
+    user_id: Optional[int] = Query(None, description="Filter by User ID"),
+    partner_id: Optional[int] = Query(None, description="Filter by Partner ID"),
+    partner_name: Optional[str] = Query(None, description="Filter by Partner Name"),
+    good_id: Optional[int] = Query(None, description="Filter by Good ID"),
+    good_name: Optional[str] = Query(None, description="Filter by Good Name"),
+    oper_type: Optional[int] = Query(None, description="Filter by Operation Type"),
+    oper_name: Optional[str] = Query(None, description="Filter by Operation Name")
+):
+    """
+    Streams all operations in a date range as NDJSON or CSV.
+    - The same visibility rules as the operations listing apply.
+    - Rows are fetched and written in batches, so memory use does not grow with the range.
+    - A date-only end_date includes the whole day.
+    """
+    try:
+        export_start, export_end = datetime.fromisoformat(start_date), datetime.fromisoformat(end_date)
+    except ValueError:
+        return commons.return_http_400_response("start_date and end_date must be dates (YYYY-MM-DD).")
+    validate_start_date_before_end_date(start_date, end_date)
+
+    # `o.Date <= '2024-10-31'` stops at midnight, so a date-only end is exported up to the next day instead
+    end_before = None
+    try:
+        end_before = (date.fromisoformat(end_date) + timedelta(days=1)).isoformat()
+        end_date = None
+    except ValueError:
+        pass
+
+    params = operation_filter_params(
+        current_user_mapping,
+        user_id=user_id,
+        partner_id=partner_id,
+        partner_name=partner_name,
+        good_id=good_id,
+        good_name=good_name,
+        oper_type=oper_type,
+        oper_name=oper_name,
+        start_date=start_date,
+        end_date=end_date,
+        end_before=end_before
+    )
+    statement = OPERATIONS_QUERY.statement(params, OPERATIONS_EXPORT_ORDER)
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+    # Built from the parsed dates, never the raw query strings, so the header cannot be broken or injected into
+    filename = f"operations_{export_start:%Y%m%d}_{export_end:%Y%m%d}.{export_format}"
+
+    if export_format == "csv":
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        stream_operations(statement, params, is_superuser, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/batch", response_model=OperationBatchResponse, response_model_exclude_none=True)
+async def get_operations_by_ids(
+    batch: BatchRequest,
+    db: AsyncSession = Depends(get_async_mssql_read_db),
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
+):
+    """
+    Retrieves many operations by ID in one call, in the order of the requested IDs.
+    The rules of the single-operation endpoint apply: non-admin users only get their own
+    operations, the others are listed in `forbidden_ids`.
+    """
+    operation_ids = list(dict.fromkeys(batch.ids))
+    rows = await db.run_sync(fetch_operations_by_ids, operation_ids)
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+
+    operations = []
+    missing_ids = []
+    forbidden_ids = []
+    for operation_id in operation_ids:
+        row = rows.get(operation_id)
+        if row is None:
+            missing_ids.append(operation_id)
+        elif not is_superuser and row.user_id != current_user_mapping.microinvest_user_id:
+            forbidden_ids.append(operation_id)
+        else:
+            operations.append(to_operation_response(row, is_superuser))
+
+    return {"operations": operations, "missing_ids": missing_ids, "forbidden_ids": forbidden_ids}
+
+
 @router.get("/{operation_id}", response_model=OperationResponse, response_model_exclude_none=True)
-def get_operation_by_id(
+async def get_operation_by_id(
     operation_id: int,
-    db: Session = Depends(get_mssql_db),
+    db: AsyncSession = Depends(get_async_mssql_read_db),
     current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
 ):
     """
@@ -153,32 +223,7 @@ def get_operation_by_id(
     Admins can access all operations.
     """
 
-    query = """
-        SELECT  
-            u.Name AS user_name,
-            p.Company AS partner_name, 
-            o.GoodID AS good_id,
-            g.Name AS good_name, 
-            ot.BG AS operation_name,
-            o.ID AS operation_id,
-            o.OperType AS operation_type,
-            o.UserID AS user_id,
-            o.PartnerID AS partner_id,
-            o.Date AS operation_date, 
-            o.Qtty AS operation_qtty, 
-            o.PriceOut AS price_out, 
-            o.PriceIn AS price_in
-        FROM dbo.Operations o
-        LEFT JOIN dbo.Users u ON o.UserID = u.ID
-        LEFT JOIN dbo.Partners p ON o.PartnerID = p.ID
-        LEFT JOIN dbo.Goods g ON o.GoodID = g.ID
-        LEFT JOIN dbo.OperationType ot ON o.OperType = ot.ID
-        WHERE o.ID = :operation_id
-    """
-
-    params = {"operation_id": operation_id}
-    result = db.execute(text(query), params)
-    operation = result.fetchone()
+    operation = (await db.run_sync(fetch_operations_by_ids, [operation_id])).get(operation_id)
 
     if not operation:
         raise HTTPException(status_code=404, detail="Operation not found.")
@@ -188,20 +233,4 @@ def get_operation_by_id(
         if operation.user_id != current_user_mapping.microinvest_user_id:
             raise HTTPException(status_code=403, detail="You do not have permission to view this operation.")
 
-    response = OperationResponse(
-        operation_id=operation.operation_id,
-        operation_type=operation.operation_type,
-        operation_name=operation.operation_name,
-        operation_date=operation.operation_date,
-        operation_qtty=operation.operation_qtty,
-        user_id=operation.user_id,
-        user_name=operation.user_name,
-        partner_id=operation.partner_id,
-        partner_name=operation.partner_name,
-        good_id=operation.good_id,
-        good_name=operation.good_name,
-        price_out=operation.price_out,
-        price_in=operation.price_in if is_superuser_based_on_user_level(current_user_mapping.user_level) else None
-    )
-
-    return response
+    return to_operation_response(operation, is_superuser_based_on_user_level(current_user_mapping.user_level))
@@ -1,128 +1,124 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy.sql import text
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import commons
-from app.db.database import get_mssql_db
-from app.schemas.partners import PartnerResponse, PartnerApiResponse
+from app.cache.record_counts import approximate_record_count, count_records
+from app.cache.response_cache import cache_response, get_cached_response, response_cache_key
+from app.columnar import columnar_response, negotiate_columnar_format
+from app.db.database import get_async_mssql_read_db, get_async_postgres_db
+from app.db.query_builder import active_params
+from app.models import UserMapping
+from app.schemas.batch import BatchRequest
+from app.schemas.partners import PartnerApiResponse, PartnerBatchResponse
+from app.services.partners import (
+    PARTNER_SERIALIZER,
+    PARTNERS_PAGE_ORDER,
+    PARTNERS_QUERY,
+    fetch_partners_by_ids,
+    partner_columns,
+    partner_to_dict,
+    to_partner_response
+)
+from app.services.search_index import PARTNER_KIND, filter_candidates
+from app.utils import get_current_user_with_mapping
 
 router = APIRouter(prefix="/microinvest/partners", tags=["Microinvest - Partners"])
 
 
 @router.get("/", response_model=PartnerApiResponse)
-def get_partners(
-    mssql_db: Session = Depends(get_mssql_db),
+async def get_partners(
+    request: Request,
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    pg_db: AsyncSession = Depends(get_async_postgres_db),
     page: int = Query(1, alias="page", ge=1),
     limit: int = Query(20, le=100, description="Number of results per page (max 100)"),
     partner_id: int = Query(None, alias="partner_id"),
     company: str = Query(None, alias="company"),
     mol: str = Query(None, alias="mol"),
     phone: str = Query(None, alias="phone"),
-    taxno: str = Query(None, alias="taxno")
+    taxno: str = Query(None, alias="taxno"),
+    after_id: int = Query(None, description="Return partners after this ID, taken from `next_cursor` (used instead of page)"),
+    approximate_count: bool = Query(False, description="Take total_records of an unfiltered listing from table statistics"),
+    fields: str = Query(None, description="Comma-separated partner fields to return, e.g. `company,city,phone` (partner_id is always included)")
 ):
-    """Returns a paginated list of partners with optional filters."""
-    
-    # Base SQL Query
-    query = """
-        SELECT 
-            p.ID AS partner_id,
-            p.Code AS partner_code,
-            COALESCE(p.Company, p.Company2) AS company,
-            COALESCE(p.MOL, p.MOL2) AS mol,
-            COALESCE(p.City, p.City2) AS city,
-            COALESCE(p.Address, p.Address2) AS address,
-            COALESCE(p.Phone, p.Phone2) AS phone,
-            p.Fax AS fax,
-            p.eMail AS email,
-            p.TaxNo AS tax_no,
-            p.Bulstat AS bulstat,
-            p.BankName AS bank_name,
-            p.BankCode AS bank_code,
-            p.BankAcct AS bank_acct,
-            p.BankVATName AS bank_vat_name,
-            p.BankVATCode AS bank_vat_code,
-            p.BankVATAcct AS bank_vat_acct,
-            p.PriceGroup AS price_group,
-            p.Discount AS discount,
-            p.Type AS type,
-            p.IsVeryUsed AS is_very_used,
-            p.UserID AS user_id,
-            p.GroupID AS group_id,
-            p.UserRealTime AS user_real_time,
-            p.Deleted AS deleted,
-            p.CardNumber AS card_number,
-            COALESCE(p.Note1, p.Note2) AS note,
-            p.PaymentDays AS payment_days
-        FROM dbo.Partners p WHERE 1=1
     """
-    
-    # Add filters dynamically
-    params = {}
-    if partner_id:
-        query += " AND ID = :partner_id"
-        params["partner_id"] = partner_id
-    if company:
-        query += " AND Company LIKE :company"
-        params["company"] = f"%{company}%"  # Search by company name
-    if mol:
-        query += " AND MOL LIKE :mol"
-        params["mol"] = f"%{mol}%"
-    if phone:
-        query += " AND Phone LIKE :phone"
-        params["phone"] = f"%{phone}%"
-    if taxno:
-        query += " AND TaxNO = :taxno"
-        params["taxno"] = taxno
+    Returns a paginated list of partners with optional filters (page or `after_id` cursor pagination).
+    Responses are cached briefly and carry an ETag, so unchanged pages can be answered with 304.
+    Send `Accept: application/vnd.apache.arrow.stream` or `application/msgpack` for a columnar (uncached) response.
+    With `fields`, only those columns are selected and returned.
+    The company, MOL and phone filters are narrowed through the partner search index,
+    refreshed every SEARCH_INDEX_REFRESH_MINUTES.
+    """
+
+    # Every caller sees the same partner fields. Only JSON responses are cached.
+    columnar_format = negotiate_columnar_format(request)
+    fields = PARTNER_SERIALIZER.select_fields(fields, required=("partner_id",))
+    cache_key = response_cache_key(request, "all")
+    cached_response = None if columnar_format else await get_cached_response(request, cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    count_params = active_params({
+        "partner_id": partner_id or None,
+        "company": f"%{company}%" if company else None,  # Search by company name
+        "mol": f"%{mol}%" if mol else None,
+        "phone": f"%{phone}%" if phone else None,
+        "taxno": taxno or None
+    })
+    # The trigram index finds the partners containing the terms, so MSSQL only checks those
+    if company or mol or phone:
+        candidates = await pg_db.run_sync(
+            filter_candidates, PARTNER_KIND, [term for term in (company, mol) if term], [phone] if phone else []
+        )
+        if candidates is not None:
+            count_params["candidate_ids"], count_params["indexed_up_to"] = candidates
+    params = dict(count_params)
 
     # Add limit and offset for pagination
     offset = (page - 1) * limit
-    
-    query += " ORDER BY ID OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+
+    # Cursor pagination seeks past the last returned ID instead of skipping rows
+    if after_id is not None:
+        params["after_id"] = after_id
+        offset = 0
+
     params["offset"] = offset
     params["limit"] = limit
 
     try:
         # Execute query
-        partners = mssql_db.execute(text(query), params).mappings().all()
+        partners = (await mssql_db.execute(PARTNERS_QUERY.statement(params, PARTNERS_PAGE_ORDER, fields), params)).mappings().all()
 
-        return {
+        total_records = None
+        if approximate_count and not count_params:
+            total_records = await approximate_record_count(mssql_db, "dbo.Partners")
+        if total_records is None:
+            total_records = await count_records(mssql_db, "partners", PARTNERS_QUERY.count_statement(count_params), count_params)
+
+        meta = {
             "page": page,
             "limit": limit,
-            "total_records": len(partners),
-            "partners": [
-                PartnerResponse(
-                    partner_id=row.partner_id,
-                    partner_code=row.partner_code,
-                    company=row.company,
-                    mol=row.mol,
-                    city=row.city,
-                    address=row.address,
-                    phone=row.phone,
-                    fax=row.fax,
-                    email=row.email,
-                    tax_no=row.tax_no,
-                    bulstat=row.bulstat,
-                    bank_name=row.bank_name,
-                    bank_code=row.bank_code,
-                    bank_acct=row.bank_acct,
-                    bank_vat_name=row.bank_vat_name,
-                    bank_vat_code=row.bank_vat_code,
-                    bank_vat_acct=row.bank_vat_acct,
-                    price_group=row.price_group,
-                    discount=row.discount,
-                    type=row.type,
-                    is_very_used=row.is_very_used,
-                    user_id=row.user_id,
-                    group_id=row.group_id,
-                    user_real_time=row.user_real_time,
-                    deleted=row.deleted,
-                    card_number=row.card_number,
-                    note=row.note,
-                    payment_days=row.payment_days
-                )
-                for row in partners
-            ]
+            "total_records": total_records,
+            "next_cursor": partners[-1].partner_id if len(partners) == limit else None
         }
+        if columnar_format:
+            return columnar_response(columnar_format, PARTNER_SERIALIZER, meta, "partners", partner_columns(partners, fields))
+        return await cache_response(request, cache_key, {**meta, "partners": [partner_to_dict(row, fields) for row in partners]})
 
     except Exception as e:
-        return commons.return_http_400_response(f'An error occurred: {e}')
\ No newline at end of file
+        return commons.return_http_400_response(f'An error occurred: {e}')
+
+@router.post("/batch", response_model=PartnerBatchResponse)
+async def get_partners_by_ids(
+    batch: BatchRequest,
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping)
+):
+    """Returns many partners by ID in one call, in the order of the requested IDs."""
+    partner_ids = list(dict.fromkeys(batch.ids))
+    rows = await mssql_db.run_sync(fetch_partners_by_ids, partner_ids)
+
+    return {
+        "partners": [to_partner_response(rows[partner_id]) for partner_id in partner_ids if partner_id in rows],
+        "missing_ids": [partner_id for partner_id in partner_ids if partner_id not in rows]
+    }
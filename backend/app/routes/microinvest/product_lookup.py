@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import commons
+from app.cache.barcode_index import barcode_index
+from app.commons import is_superuser_based_on_user_level
+from app.db.database import get_async_mssql_read_db
+from app.models import UserMapping
+from app.schemas.products import (
+    ProductBatchLookupRequest, ProductBatchLookupResponse, ProductLookupResponse
+)
+from app.services.products import fetch_products_by_ids, to_product_response
+from app.utils import get_current_user_with_mapping
+
+router = APIRouter(prefix="/microinvest/products", tags=["Microinvest - Products"])
+
+
+async def _resolve(mssql_db: AsyncSession, codes: list[str]) -> tuple[dict, dict]:
+    """Resolves codes to product IDs through the barcode index, then loads the products by ID."""
+    # The index is loaded by the cron job at startup, never in a request; until then MSSQL resolves the codes
+    if barcode_index.loaded:
+        product_ids = {code: barcode_index.resolve(code) for code in codes}
+    else:
+        product_ids = await mssql_db.run_sync(barcode_index.resolve_in_db, codes)
+    rows = await mssql_db.run_sync(
+        fetch_products_by_ids, list({product_id for product_id in product_ids.values() if product_id is not None})
+    )
+    return product_ids, rows
+
+
+@router.get("/lookup", response_model=ProductLookupResponse)
+async def lookup_product(
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
+    code: str = Query(..., min_length=1, max_length=100, description="Barcode (BarCode1-3) or product code"),
+    price_group: int = Query(None, ge=1, le=10, description="Price group of the partner (`price_group`) to price for")
+):
+    """
+    Returns the product with the given barcode or code, as scanned at the counter.
+    The code is resolved through an in-memory index, then the product is read by its ID.
+    """
+    product_ids, rows = await _resolve(mssql_db, [code])
+    row = rows.get(product_ids[code])
+    if row is None:
+        return commons.return_http_404_response("Product not found!")
+
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+    return {"code": code, "product": to_product_response(row, is_superuser, price_group)}
+
+
+@router.post("/lookup", response_model=ProductBatchLookupResponse)
+async def lookup_products(
+    lookup: ProductBatchLookupRequest,
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
+    price_group: int = Query(None, ge=1, le=10, description="Price group of the partner (`price_group`) to price for")
+):
+    """Resolves many barcodes or codes in one call. Codes no product has are listed in `not_found`."""
+    product_ids, rows = await _resolve(mssql_db, lookup.codes)
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+
+    results = []
+    not_found = []
+    for code in lookup.codes:
+        row = rows.get(product_ids[code])
+        if row is None:
+            not_found.append(code)
+        else:
+            results.append({"code": code, "product": to_product_response(row, is_superuser, price_group)})
+
+    return {"results": results, "not_found": not_found}
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.commons import is_superuser_based_on_user_level
+from app.db.database import get_async_mssql_read_db, get_async_postgres_db
+from app.models import UserMapping
+from app.pagination import encode_cursor, decode_sync_token
+from app.schemas.products import ProductSyncResponse
+from app.services.product_sync import get_product_changes
+from app.services.products import fetch_products_by_ids, to_product_response
+from app.utils import get_current_user_with_mapping
+
+router = APIRouter(prefix="/microinvest/products", tags=["Microinvest - Products"])
+
+
+@router.get("/sync", response_model=ProductSyncResponse)
+async def sync_products(
+    pg_db: AsyncSession = Depends(get_async_postgres_db),
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
+    since: str = Query(None, description="`sync_token` returned by the previous sync (omit for a full sync)"),
+    limit: int = Query(500, gt=0, le=1000, description="Max number of changes per response (max 1000)")
+):
+    """
+    Returns the products inserted, changed or deleted since the given sync token.
+    - Changes are detected by comparing content hashes stored in Postgres.
+    - While `has_more` is true, the client should sync again with the new `sync_token`.
+    """
+    since_version, since_good_id = decode_sync_token(since) if since else (0, 0)
+
+    changes = await pg_db.run_sync(get_product_changes, since_version, since_good_id, limit + 1)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    rows = await mssql_db.run_sync(fetch_products_by_ids, [change.good_id for change in changes if not change.deleted])
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+
+    products = []
+    deleted_ids = []
+    for change in changes:
+        row = rows.get(change.good_id)
+        # A good may have been removed after the last refresh
+        if change.deleted or row is None:
+            deleted_ids.append(change.good_id)
+        else:
+            products.append(to_product_response(row, is_superuser))
+
+    if changes:
+        sync_token = encode_cursor(changes[-1].version, changes[-1].good_id)
+    else:
+        sync_token = encode_cursor(since_version, since_good_id)
+
+    return {
+        "sync_token": sync_token,
+        "has_more": has_more,
+        "products": products,
+        "deleted_ids": deleted_ids
+    }
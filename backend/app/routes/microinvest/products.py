@@ -1,20 +1,39 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import commons
+from app.cache.record_counts import count_records
+from app.cache.response_cache import cache_response, get_cached_response, response_cache_key
+from app.columnar import columnar_response, negotiate_columnar_format
 from app.commons import is_superuser_based_on_user_level
-from app.db.database import get_mssql_db
+from app.db.database import get_async_mssql_read_db, get_async_postgres_db
+from app.db.query_builder import active_params
 from app.models import UserMapping
-from app.schemas.products import ProductResponse, ProductApiResponse
+from app.schemas.batch import BatchRequest
+from app.schemas.products import ProductApiResponse, ProductBatchResponse
+from app.services.products import (
+    PRODUCT_SERIALIZER,
+    PRODUCTS_PAGE_ORDER,
+    PRODUCTS_QUERY,
+    approximate_product_count,
+    fetch_products_by_ids,
+    load_product_prices,
+    product_columns,
+    product_to_dict,
+    selects_price,
+    to_product_response
+)
+from app.services.search_index import PRODUCT_KIND, filter_candidates
 from app.utils import get_current_user_with_mapping
 
 router = APIRouter(prefix="/microinvest/products", tags=["Microinvest - Products"])
 
 
 @router.get("/", response_model=ProductApiResponse)
-def get_products(
-    mssql_db: Session = Depends(get_mssql_db),
+async def get_products(
+    request: Request,
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    pg_db: AsyncSession = Depends(get_async_postgres_db),
     current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
     product_id: int = Query(None, description="Filter by product id"),
     name: str = Query(None, description="Filter by product name"),
@@ -22,113 +41,106 @@ def get_products(
     bar_code: str = Query(None, description="Filter by barcode"),
     # page: int = Query(1, ge=1, description="Page number (1-based index)"),
     limit: int = Query(20, le=100, description="Number of results per page (max 100)"),
-    offset: int = Query(0, description="Offset for pagination", ge=0)
+    offset: int = Query(0, description="Offset for pagination", ge=0),
+    after_id: int = Query(None, description="Return products after this ID, taken from `next_cursor` (used instead of offset)"),
+    approximate_count: bool = Query(False, description="Take total_records of an unfiltered listing from the in-memory price projection"),
+    price_group: int = Query(
+        None, ge=1, le=10,
+        description="Price group of the partner (`price_group`) to price for. Prices may be a few minutes old, see below"
+    ),
+    fields: str = Query(None, description="Comma-separated product fields to return, e.g. `name,code,price_out` (product_id is always included)")
 ):
-    """Returns a paginated list of products from Microinvest"""
+    """
+    Returns a paginated list of products from Microinvest (offset or `after_id` cursor pagination)
+    Responses are cached briefly and carry an ETag, so unchanged pages can be answered with 304.
+    Send `Accept: application/vnd.apache.arrow.stream` or `application/msgpack` for a columnar (uncached) response.
+    With `fields`, only those columns are selected and returned.
+    The name filter is narrowed through the product search index, refreshed every SEARCH_INDEX_REFRESH_MINUTES.
+    price_out comes from the in-memory price projection: a price change shows up after the product sync
+    notices it (PRODUCT_SYNC_REFRESH_MINUTES) and the projection applies it (GOODS_PROJECTION_REFRESH_SECONDS),
+    plus the response cache TTL. Use `/batch` for current prices.
+    """
 
     # offset = (page - 1) * limit  # Calculates where to start next page from
-    print(f"NAME: {name}")
-    print(f"CODE: {code}")
-    print(f"BAR CODE: {bar_code}")
 
-    query = text(f"""
-        SELECT
-            ID AS product_id,
-            Code AS code,
-            COALESCE(BarCode1, BarCode2, BarCode3) AS bar_code,
-            COALESCE(Catalog1, Catalog2, Catalog3) AS catalog,
-            COALESCE(Name, Name2) AS name,
-            COALESCE(Measure1, Measure2) AS measure,
-            Ratio AS ratio,
-            PriceIn AS price_in,
-            ca.price_out AS price_out,
-            MinQtty AS min_qtty,
-            NormalQtty AS normal_qtty,
-            Description AS description,
-            Type AS type,
-            IsRecipe AS is_recipe,
-            TaxGroup AS tax_group,
-            IsVeryUsed AS is_very_used,
-            GroupID AS group_id,
-            Deleted AS deleted
-        FROM dbo.Goods
-        CROSS APPLY (
-            SELECT TOP 1 price_out
-            FROM (VALUES
-                (PriceOut1),
-                (PriceOut2),
-                (PriceOut3),
-                (PriceOut4),
-                (PriceOut5),
-                (PriceOut6),
-                (PriceOut7),
-                (PriceOut8),
-                (PriceOut9),
-                (PriceOut10)
-            ) AS PriceTable(price_out)
-            WHERE price_out > 0
-            ORDER BY price_out
-        ) ca
-        WHERE 1 = 1
-    """)
+    # price_in is only visible to superusers, so they get their own cache entries
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+    # Only JSON responses are cached
+    columnar_format = negotiate_columnar_format(request)
+    fields = PRODUCT_SERIALIZER.select_fields(fields, required=("product_id",))
+    cache_key = response_cache_key(request, "superuser" if is_superuser else "user")
+    cached_response = None if columnar_format else await get_cached_response(request, cache_key)
+    if cached_response is not None:
+        return cached_response
 
-    if product_id:
-        query = text(f"{query.text} AND ID = :product_id")
+    name = name.strip() if name else None
+    code = code.strip() if code else None
+    bar_code = bar_code.strip() if bar_code else None
+
+    count_params = active_params({
+        "product_id": product_id or None,
+        "name": f"%{name}%" if name else None,
+        "code": code or None,
+        "barcode": bar_code or None
+    })
+    # The trigram index finds the products containing the name, so MSSQL only checks those
     if name:
-        name = name.strip()
-        query = text(f"{query.text} AND Name LIKE :name")
-    if code:
-        code = code.strip()
-        query = text(f"{query.text} AND Code = :code")
-    if bar_code:
-        bar_code = bar_code.strip()
-        query = text(f"{query.text} AND COALESCE(BarCode1, BarCode2, BarCode3) = :barcode")
+        candidates = await pg_db.run_sync(filter_candidates, PRODUCT_KIND, [name])
+        if candidates is not None:
+            count_params["candidate_ids"], count_params["indexed_up_to"] = candidates
+    params = dict(count_params)
+
+    # Cursor pagination seeks past the last returned ID instead of skipping rows
+    if after_id is not None:
+        params["after_id"] = after_id
+        offset = 0
 
     # Add Pagination
-    query = text(f"{query.text} ORDER BY ID OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY")
+    params["offset"] = offset
+    params["limit"] = limit
+    query = PRODUCTS_QUERY.statement(params, PRODUCTS_PAGE_ORDER, fields)
 
     try:
-        print(f"QUERY: {query}")
-        products = mssql_db.execute(query, {
-            "product_id": product_id,
-            "name": f"%{name}%" if name else None,
-            "code": code,
-            "barcode": bar_code,
-            "offset": offset,
-            "limit": limit
-        }).mappings().all()
-        print(f"PRODUCTS: {products}")
-        print(f"LIMIT: {limit}")
-        print(f"OFFSET: {offset}")
-        return {
+        products = (await mssql_db.execute(query, params)).mappings().all()
+        if selects_price(fields):
+            await mssql_db.run_sync(load_product_prices, [row.product_id for row in products])
+
+        total_records = None
+        if approximate_count and not count_params:
+            total_records = approximate_product_count()
+        if total_records is None:
+            total_records = await count_records(mssql_db, "products", PRODUCTS_QUERY.count_statement(count_params), count_params)
+        meta = {
             "offset": offset,
             "limit": limit,
-            "total_records": len(products),
-            "products": [
-                ProductResponse(
-                    product_id=row.product_id,
-                    code=row.code,
-                    bar_code=row.bar_code,
-                    catalog=row.catalog,
-                    name=row.name,
-                    measure=row.measure,
-                    ratio=row.ratio,
-                    # Hide price_in for non-admins
-                    price_in=row.price_in if is_superuser_based_on_user_level(current_user_mapping.user_level) else None,
-                    price_out=row.price_out,
-                    min_qtty=row.min_qtty,
-                    normal_qtty=row.normal_qtty,
-                    description=row.description,
-                    type=row.type,
-                    is_recipe=row.is_recipe,
-                    tax_group=row.tax_group,
-                    is_very_used=row.is_very_used,
-                    group_id=row.group_id,
-                    deleted=row.deleted,
-                )
-                for row in products
-            ]
+            "total_records": total_records,
+            "next_cursor": products[-1].product_id if len(products) == limit else None
         }
+        if columnar_format:
+            return columnar_response(
+                columnar_format, PRODUCT_SERIALIZER, meta, "products", product_columns(products, is_superuser, price_group, fields)
+            )
+        return await cache_response(request, cache_key, {
+            **meta,
+            "products": [product_to_dict(row, is_superuser, price_group, fields) for row in products]
+        })
 
     except Exception as e:
-        return commons.return_http_400_response(f'An error occurred: {e}')
\ No newline at end of file
+        return commons.return_http_400_response(f'An error occurred: {e}')
+
+@router.post("/batch", response_model=ProductBatchResponse)
+async def get_products_by_ids(
+    batch: BatchRequest,
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
+    price_group: int = Query(None, ge=1, le=10, description="Price group of the partner (`price_group`) to price for")
+):
+    """Returns many products by ID in one call, in the order of the requested IDs."""
+    product_ids = list(dict.fromkeys(batch.ids))
+    rows = await mssql_db.run_sync(fetch_products_by_ids, product_ids)
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+
+    return {
+        "products": [to_product_response(rows[product_id], is_superuser, price_group) for product_id in product_ids if product_id in rows],
+        "missing_ids": [product_id for product_id in product_ids if product_id not in rows]
+    }
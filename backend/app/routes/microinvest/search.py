@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.commons import is_superuser_based_on_user_level
+from app.db.database import get_async_mssql_read_db, get_async_postgres_db
+from app.models import UserMapping
+from app.schemas.partners import PartnerSearchResponse
+from app.schemas.products import ProductSearchResponse
+from app.services.partners import fetch_partners_by_ids, to_partner_response
+from app.services.products import fetch_products_by_ids, to_product_response
+from app.services.search_index import PARTNER_KIND, PRODUCT_KIND, search_entities
+from app.utils import get_current_user_with_mapping
+
+router = APIRouter(prefix="/microinvest/search", tags=["Microinvest - Search"])
+
+
+@router.get("/products", response_model=ProductSearchResponse)
+async def search_products(
+    pg_db: AsyncSession = Depends(get_async_postgres_db),
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
+    q: str = Query(..., min_length=2, max_length=100, description="Part of a product name, code or barcode"),
+    limit: int = Query(20, gt=0, le=100, description="Max number of results (max 100)"),
+    price_group: int = Query(None, ge=1, le=10, description="Price group of the partner (`price_group`) to price for")
+):
+    """
+    Searches products by name, code or barcode, tolerating typos.
+    Matches come from the trigram search index in Postgres, best match first.
+    """
+    product_ids = await pg_db.run_sync(search_entities, PRODUCT_KIND, q, limit)
+    rows = await mssql_db.run_sync(fetch_products_by_ids, product_ids)
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+
+    return {
+        "query": q,
+        # Keep the search ranking; skip products removed since the last index refresh
+        "products": [to_product_response(rows[product_id], is_superuser, price_group) for product_id in product_ids if product_id in rows]
+    }
+
+
+@router.get("/partners", response_model=PartnerSearchResponse)
+async def search_partners(
+    pg_db: AsyncSession = Depends(get_async_postgres_db),
+    mssql_db: AsyncSession = Depends(get_async_mssql_read_db),
+    current_user_mapping: UserMapping = Depends(get_current_user_with_mapping),
+    q: str = Query(..., min_length=2, max_length=100, description="Part of a partner company, MOL, code, phone or tax number"),
+    limit: int = Query(20, gt=0, le=100, description="Max number of results (max 100)")
+):
+    """
+    Searches partners by company, MOL, code, phone or tax number, tolerating typos.
+    Matches come from the trigram search index in Postgres, best match first.
+    """
+    partner_ids = await pg_db.run_sync(search_entities, PARTNER_KIND, q, limit)
+    rows = await mssql_db.run_sync(fetch_partners_by_ids, partner_ids)
+
+    return {
+        "query": q,
+        "partners": [to_partner_response(rows[partner_id]) for partner_id in partner_ids if partner_id in rows]
+    }
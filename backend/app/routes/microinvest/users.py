@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
+from app.cache.user_mapping import invalidate_user_mapping, user_mapping_cache
 from app.db.database import get_postgres_db, get_mssql_db
 from app.models import User, UserMapping
 from app.schemas.user_mapping import UserMappingCreate, UserMappingResponse
@@ -58,6 +59,7 @@ def map_user(
 
     db.add(new_mapping)
     db.commit()
+    invalidate_user_mapping(new_mapping.user_id, db)
     db.refresh(new_mapping)
 
     # return {"message": "User successfully mapped!", "user_id": current_user.id, "microinvest_user_id": mapping_data.microinvest_user_id}
@@ -82,11 +84,21 @@ def unmap_user(
         raise HTTPException(status_code=404, detail="User mapping not found.")
     
     # Delete mapping
+    mapped_user_id = mapping.user_id
     db.delete(mapping)
     db.commit()
+    invalidate_user_mapping(mapped_user_id, db)
 
     return {"messasge": "User successfully unmapped."}
-    
 
 
+@router.get("/cache/stats")
+def get_user_mapping_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Returns the hit/miss counters of the user mapping cache (Admin/Superuser only)."""
+
+    if not (current_user.is_superuser or current_user.role.name == RoleName.ADMIN):
+        raise HTTPException(status_code=403, detail="You do not have permission to view cache statistics.")
 
+    return user_mapping_cache.stats()
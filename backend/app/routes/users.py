@@ -3,6 +3,7 @@ from typing import List, Union
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app import models, commons
+from app.cache.user_mapping import invalidate_user_mapping
 from app.schemas import user
 from app.db import database
 from app.utils import get_password_hash, get_current_user
@@ -153,5 +154,6 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    invalidate_user_mapping(user_id, db)
     return {"message": "User deleted successfully."}
 
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class BatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)  # Results are returned in this order (max 1000)
@@ -26,4 +26,11 @@ class OperationApiResponse(BaseModel):
     page: int
     limit: int
     total_records: int
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
     operations: Optional[List[OperationResponse]]
+
+
+class OperationBatchResponse(BaseModel):
+    operations: List[OperationResponse]  # In the order of the requested IDs
+    missing_ids: List[int]
+    forbidden_ids: List[int]  # Operations of other users, for non-admins
@@ -42,4 +42,15 @@ class PartnerApiResponse(BaseModel):
     page: int
     limit: int
     total_records: int
+    next_cursor: Optional[int] = None  # Pass as `after_id` to fetch the next page
     partners: Optional[List[PartnerResponse]]
+
+
+class PartnerSearchResponse(BaseModel):
+    query: str
+    partners: List[PartnerResponse]  # Best matches first
+
+
+class PartnerBatchResponse(BaseModel):
+    partners: List[PartnerResponse]  # In the order of the requested IDs
+    missing_ids: List[int]
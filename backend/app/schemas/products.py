@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
 
@@ -30,4 +30,36 @@ class ProductApiResponse(BaseModel):
     offset: int
     limit: int
     total_records: int
+    next_cursor: Optional[int] = None  # Pass as `after_id` to fetch the next page
     products: Optional[List[ProductResponse]]
+
+
+class ProductSyncResponse(BaseModel):
+    sync_token: str  # Pass as `since` on the next sync
+    has_more: bool  # More changes are waiting, sync again right away
+    products: List[ProductResponse]  # Inserted or changed products
+    deleted_ids: List[int]  # Products removed or marked as deleted
+
+
+class ProductSearchResponse(BaseModel):
+    query: str
+    products: List[ProductResponse]  # Best matches first
+
+
+class ProductLookupResponse(BaseModel):
+    code: str  # The barcode or code as requested
+    product: ProductResponse
+
+
+class ProductBatchLookupRequest(BaseModel):
+    codes: List[str] = Field(..., min_length=1, max_length=1000)  # Barcodes or codes (max 1000)
+
+
+class ProductBatchLookupResponse(BaseModel):
+    results: List[ProductLookupResponse]  # In the order of the requested codes
+    not_found: List[str]
+
+
+class ProductBatchResponse(BaseModel):
+    products: List[ProductResponse]  # In the order of the requested IDs
+    missing_ids: List[int]
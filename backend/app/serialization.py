@@ -0,0 +1,139 @@
+import json
+import types
+import typing
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the standard library encoder gives the same output
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Encodes JSON-compatible values (and datetimes/Decimals) to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """
+    Returns already encoded JSON. FastAPI passes a returned Response through as is,
+    so `response_model` is only used for the docs and the rows are not validated a second time.
+    """
+    return Response(content=dumps(content), status_code=status_code, headers=headers, media_type="application/json")
+
+
+def _base_type(annotation):
+    # Optional[X] -> X
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+    return annotation
+
+
+def _converter(annotation):
+    # Coerce like pydantic does for these fields: Decimal -> float, bool -> int
+    if annotation is float:
+        return float
+    if annotation is int:
+        return int
+    return None
+
+
+class RowSerializer:
+    """
+    Maps database rows straight to the dicts a response model would produce, without building
+    the model: the same fields in the same order, with the same float/int coercion.
+    """
+
+    def __init__(self, model: type[BaseModel]):
+        self.types = {name: _base_type(field.annotation) for name, field in model.model_fields.items()}
+        self.fields = [(name, _converter(type_)) for name, type_ in self.types.items()]
+        # Selected field tuple -> its (name, converter) pairs
+        self._selection = lru_cache(maxsize=256)(self._select)
+
+    def select_fields(self, fields: Optional[str], required: Iterable[str] = ()) -> Optional[tuple[str, ...]]:
+        """
+        Parses a comma-separated `fields` query parameter into the selected field names,
+        in the order of the model and always including the `required` fields.
+        Returns None (all fields) when `fields` is empty. Answers 400 for unknown field names.
+        """
+        names = {name.strip() for name in (fields or "").split(",")} - {""}
+        if not names:
+            return None
+        unknown = sorted(names - self.types.keys())
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(self.types)}"
+            )
+        names.update(required)
+        return tuple(name for name in self.types if name in names)
+
+    def _fields(self, fields: Optional[tuple[str, ...]]) -> list:
+        return self.fields if fields is None else self._selection(fields)
+
+    def _select(self, fields: tuple[str, ...]) -> list:
+        return [(name, convert) for name, convert in self.fields if name in fields]
+
+    def serialize(
+        self,
+        row,
+        hidden: Iterable[str] = (),
+        values: Optional[dict] = None,
+        exclude_none: bool = False,
+        fields: Optional[tuple[str, ...]] = None
+    ) -> dict:
+        """
+        Returns the fields of a row (a RowMapping), where `hidden` fields are None
+        and `values` replaces or adds fields the row does not have.
+        With `fields` (from `select_fields`), only those fields are returned.
+        """
+        item = {}
+        for name, convert in self._fields(fields):
+            if name in hidden:
+                value = None
+            elif values is not None and name in values:
+                value = values[name]
+            else:
+                value = row[name]
+
+            if value is None:
+                if exclude_none:
+                    continue
+            elif convert is not None:
+                value = convert(value)
+            item[name] = value
+        return item
+
+    def columns(
+        self, rows: list, hidden: Iterable[str] = (), values: Optional[dict] = None, fields: Optional[tuple[str, ...]] = None
+    ) -> dict:
+        """
+        Returns the fields of the rows column by column (name -> list of values), for columnar formats.
+        `hidden` columns are all None and `values` gives whole columns the rows do not have.
+        """
+        columns = {}
+        for name, convert in self._fields(fields):
+            if name in hidden:
+                columns[name] = [None] * len(rows)
+            elif values is not None and name in values:
+                columns[name] = list(values[name])
+            elif convert is None:
+                columns[name] = [row[name] for row in rows]
+            else:
+                columns[name] = [None if (value := row[name]) is None else convert(value) for row in rows]
+        return columns
@@ -0,0 +1,173 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.enums.operations import OperationTypeID
+from app.schemas.dashboard import DashboardResponse, TopEntity
+from app.schemas.operations import OperationResponse
+from app.services.operations import to_operation_response
+
+RECENT_OPERATIONS_QUERY = """
+    SELECT TOP 5
+        o.ID AS operation_id,
+        o.OperType AS operation_type,
+        o.Date AS operation_date,
+        o.Qtty AS operation_qtty,
+        o.PriceOut AS price_out,
+        o.PriceIn AS price_in,
+        ot.BG AS operation_name,
+        g.Name AS good_name,
+        g.ID AS good_id,
+        p.Company AS partner_name,
+        p.ID AS partner_id,
+        o.UserID AS user_id,
+        u.Name AS user_name
+    FROM dbo.Operations o
+    LEFT JOIN dbo.OperationType ot ON o.OperType = ot.ID
+    LEFT JOIN dbo.Goods g ON o.GoodID = g.ID
+    LEFT JOIN dbo.Partners p ON o.PartnerID = p.ID
+    LEFT JOIN dbo.Users u ON o.UserID = u.ID
+    WHERE o.OperType = :operation_type
+    AND o.Date BETWEEN :start_date AND :end_date
+    {user_filter}
+    ORDER BY o.Date DESC
+"""
+
+# Computes every dashboard aggregate in a single statement:
+# - totals, per-partner and per-good sums come from one GROUPING SETS pass over the window
+# - the five most recent sales are appended to the same result set
+# Rows are told apart by `row_kind`. The NULLs are cast explicitly, because an untyped NULL
+# is an INT in SQL Server and would force the string columns of the UNION to INT.
+DASHBOARD_QUERY = """
+    WITH window_operations AS (
+        SELECT o.PartnerID, o.GoodID, o.Qtty, o.PriceOut * o.Qtty AS revenue
+        FROM dbo.Operations o
+        WHERE o.OperType = :operation_type
+        AND o.Date BETWEEN :start_date AND :end_date
+        {user_filter}
+    ),
+    aggregates AS (
+        SELECT
+            CASE
+                WHEN GROUPING(PartnerID) = 0 THEN 'top_partner'
+                WHEN GROUPING(GoodID) = 0 THEN 'top_good'
+                ELSE 'totals'
+            END AS row_kind,
+            COALESCE(PartnerID, GoodID) AS entity_id,
+            COUNT(*) AS total_sales,
+            SUM(Qtty) AS total_quantity,
+            SUM(revenue) AS total_revenue
+        FROM window_operations
+        GROUP BY GROUPING SETS ((), (PartnerID), (GoodID))
+    ),
+    ranked AS (
+        SELECT
+            a.*,
+            ROW_NUMBER() OVER (PARTITION BY a.row_kind ORDER BY a.total_revenue DESC) AS entity_rank
+        FROM aggregates a
+        WHERE a.row_kind = 'totals' OR a.entity_id IS NOT NULL
+    )
+    SELECT
+        r.row_kind,
+        r.entity_id,
+        COALESCE(p.Company, g.Name) AS entity_name,
+        r.total_sales,
+        r.total_quantity,
+        r.total_revenue,
+        CAST(NULL AS INT) AS operation_id,
+        CAST(NULL AS INT) AS operation_type,
+        CAST(NULL AS DATETIME) AS operation_date,
+        CAST(NULL AS FLOAT) AS operation_qtty,
+        CAST(NULL AS FLOAT) AS price_out,
+        CAST(NULL AS FLOAT) AS price_in,
+        CAST(NULL AS NVARCHAR(255)) AS operation_name,
+        CAST(NULL AS NVARCHAR(255)) AS good_name,
+        CAST(NULL AS INT) AS good_id,
+        CAST(NULL AS NVARCHAR(255)) AS partner_name,
+        CAST(NULL AS INT) AS partner_id,
+        CAST(NULL AS INT) AS user_id,
+        CAST(NULL AS NVARCHAR(255)) AS user_name
+    FROM ranked r
+    LEFT JOIN dbo.Partners p ON r.row_kind = 'top_partner' AND p.ID = r.entity_id
+    LEFT JOIN dbo.Goods g ON r.row_kind = 'top_good' AND g.ID = r.entity_id
+    WHERE r.entity_rank = 1
+
+    UNION ALL
+
+    SELECT
+        'recent' AS row_kind,
+        CAST(NULL AS INT) AS entity_id,
+        CAST(NULL AS NVARCHAR(255)) AS entity_name,
+        CAST(NULL AS INT) AS total_sales,
+        CAST(NULL AS FLOAT) AS total_quantity,
+        CAST(NULL AS FLOAT) AS total_revenue,
+        recent.*
+    FROM (
+""" + RECENT_OPERATIONS_QUERY + """    ) recent
+
+    ORDER BY row_kind, operation_date DESC
+"""
+
+
+def fetch_recent_operations(
+    db: Session,
+    start_date: str,
+    end_date: str,
+    microinvest_user_id: int,
+    is_staff: bool
+) -> list[OperationResponse]:
+    """Returns the five most recent sales in the window."""
+    user_filter = "" if is_staff else "AND o.UserID = :user_id"
+    params = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "user_id": microinvest_user_id,
+        "operation_type": OperationTypeID.SALE
+    }
+
+    rows = db.execute(text(RECENT_OPERATIONS_QUERY.format(user_filter=user_filter)), params).mappings().all()
+    return [to_operation_response(row, is_staff) for row in rows]
+
+
+def build_dashboard(
+    db: Session,
+    start_date: str,
+    end_date: str,
+    microinvest_user_id: int,
+    is_staff: bool
+) -> DashboardResponse:
+    """
+    Builds the dashboard for the given window with a single round trip to MSSQL.
+    Non-staff users only see their own sales and never see price_in.
+    """
+    user_filter = "" if is_staff else "AND o.UserID = :user_id"
+    params = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "user_id": microinvest_user_id,
+        "operation_type": OperationTypeID.SALE
+    }
+
+    rows = db.execute(text(DASHBOARD_QUERY.format(user_filter=user_filter)), params).mappings().all()
+
+    totals = None
+    top_partner = None
+    top_good = None
+    recent_operations = []
+    for row in rows:
+        if row.row_kind == "totals":
+            totals = row
+        elif row.row_kind == "top_partner":
+            top_partner = TopEntity(id=row.entity_id, name=row.entity_name, value=row.total_revenue)
+        elif row.row_kind == "top_good":
+            top_good = TopEntity(id=row.entity_id, name=row.entity_name, value=row.total_revenue)
+        else:
+            recent_operations.append(to_operation_response(row, is_staff))
+
+    return DashboardResponse(
+        total_sales=(totals.total_sales if totals else None) or 0,
+        total_quantity=(totals.total_quantity if totals else None) or 0,
+        total_revenue=(totals.total_revenue if totals else None) or 0.0,
+        top_partner=top_partner,
+        top_good=top_good,
+        recent_operations=recent_operations
+    )
@@ -0,0 +1,190 @@
+import csv
+import io
+from typing import Iterator, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from app.commons import is_superuser_based_on_user_level
+from app.db.database import MSSQLReadSessionLocal
+from app.db.query_builder import INTEGER_PARAM, MAX_IDS_PER_QUERY, STRING_PARAM, QueryTemplate, active_params
+from app.schemas.operations import OperationResponse
+from app.schemas.user_mapping import UserMappingResponse
+from app.serialization import RowSerializer, dumps
+
+# Operation columns shared by the operations listing, export and reads by ID
+OPERATION_COLUMNS = """
+    SELECT
+        u.Name AS user_name,
+        p.Company AS partner_name,
+        GoodID AS good_id,
+        g.Name AS good_name,
+        ot.BG AS operation_name,
+        o.ID AS operation_id,
+        o.OperType AS operation_type,
+        o.UserID AS user_id,
+        o.PartnerID AS partner_id,
+        o.Date AS operation_date,
+        o.Qtty AS operation_qtty,
+        o.PriceOut AS price_out,
+        o.PriceIn AS price_in
+    FROM dbo.Operations o
+    LEFT JOIN dbo.Users u ON o.UserID = u.ID
+    LEFT JOIN dbo.Partners p ON o.PartnerID = p.ID
+    LEFT JOIN dbo.Goods g ON o.GoodID = g.ID
+    LEFT JOIN dbo.OperationType ot ON o.OperType = ot.ID
+"""
+OPERATION_SELECT = OPERATION_COLUMNS + """
+    WHERE 1=1
+    AND ot.BG IS NOT NULL
+"""
+
+# Operation filters in their fixed order. The cursor filter seeks past the last returned (Date, ID).
+OPERATIONS_QUERY = QueryTemplate(
+    OPERATION_SELECT,
+    filters=[
+        ("current_user_id", "o.UserID = :current_user_id"),
+        ("user_id", "o.UserID = :user_id"),
+        ("partner_id", "o.PartnerID = :partner_id"),
+        ("partner_name", "p.Company = :partner_name"),
+        ("good_id", "o.GoodID = :good_id"),
+        ("good_name", "g.Name = :good_name"),
+        ("oper_type", "o.OperType = :oper_type"),
+        ("oper_name", "ot.BG = :oper_name"),
+        ("start_date", "o.Date >= :start_date"),
+        ("end_date", "o.Date <= :end_date"),
+        ("end_before", "o.Date < :end_before"),
+        ("cursor_id", "(o.Date < :cursor_date OR (o.Date = :cursor_date AND o.ID < :cursor_id))"),
+    ],
+    param_types={
+        "current_user_id": INTEGER_PARAM,
+        "user_id": INTEGER_PARAM,
+        "partner_id": INTEGER_PARAM,
+        "partner_name": STRING_PARAM,
+        "good_id": INTEGER_PARAM,
+        "good_name": STRING_PARAM,
+        "oper_type": INTEGER_PARAM,
+        "oper_name": STRING_PARAM,
+        "start_date": STRING_PARAM,
+        "end_date": STRING_PARAM,
+        "end_before": STRING_PARAM,
+        "cursor_date": STRING_PARAM,
+        "cursor_id": INTEGER_PARAM,
+        "offset": INTEGER_PARAM,
+        "limit": INTEGER_PARAM,
+    }
+)
+OPERATIONS_PAGE_ORDER = " ORDER BY o.Date DESC, o.ID DESC OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+OPERATIONS_EXPORT_ORDER = " ORDER BY o.Date, o.ID"
+
+# Number of rows fetched from MSSQL and written to the response at a time when exporting
+EXPORT_BATCH_SIZE = 1000
+
+OPERATION_SERIALIZER = RowSerializer(OperationResponse)
+
+
+def to_operation_response(row, is_superuser: bool) -> OperationResponse:
+    return OperationResponse(
+        operation_id=row.operation_id,
+        operation_type=row.operation_type,
+        operation_name=row.operation_name,
+        operation_date=row.operation_date,
+        operation_qtty=row.operation_qtty,
+        user_id=row.user_id,
+        user_name=row.user_name,
+        partner_id=row.partner_id,
+        partner_name=row.partner_name,
+        good_id=row.good_id,
+        good_name=row.good_name,
+        price_out=row.price_out,
+        price_in=row.price_in if is_superuser else None  # Hide PriceIn for non-admins
+    )
+
+
+def operation_to_dict(row, is_superuser: bool, exclude_none: bool = True) -> dict:
+    """Same fields as `to_operation_response`, without building the model (for list responses)."""
+    # Hide PriceIn for non-admins
+    return OPERATION_SERIALIZER.serialize(row, hidden=() if is_superuser else ("price_in",), exclude_none=exclude_none)
+
+
+def operation_columns(rows: list, is_superuser: bool) -> dict:
+    """Same fields as `operation_to_dict`, column by column (for columnar list responses)."""
+    return OPERATION_SERIALIZER.columns(rows, hidden=() if is_superuser else ("price_in",))
+
+
+def operation_filter_params(
+    current_user_mapping: UserMappingResponse,
+    user_id: Optional[int] = None,
+    partner_id: Optional[int] = None,
+    partner_name: Optional[str] = None,
+    good_id: Optional[int] = None,
+    good_name: Optional[str] = None,
+    oper_type: Optional[int] = None,
+    oper_name: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    end_before: Optional[str] = None
+) -> dict:
+    """
+    Returns the parameters of the active operation filters for `OPERATIONS_QUERY`.
+    Non-admin users are always restricted to their own operations.
+    `end_date` includes operations up to that instant, `end_before` those before it.
+    """
+    is_superuser = is_superuser_based_on_user_level(current_user_mapping.user_level)
+    # Empty values (0, "") leave a filter out, as they always have
+    return active_params({
+        "current_user_id": None if is_superuser else current_user_mapping.microinvest_user_id,
+        "user_id": user_id if user_id and is_superuser else None,
+        "partner_id": partner_id or None,
+        "partner_name": partner_name or None,
+        "good_id": good_id or None,
+        "good_name": good_name or None,
+        "oper_type": oper_type or None,
+        "oper_name": oper_name or None,
+        "start_date": start_date or None,
+        "end_date": end_date or None,
+        "end_before": end_before or None
+    })
+
+
+def fetch_operations_by_ids(db: Session, operation_ids: list[int]) -> dict:
+    """Returns the operation rows with the given IDs, keyed by ID."""
+    query = text(f"{OPERATION_COLUMNS} WHERE o.ID IN :operation_ids").bindparams(
+        bindparam("operation_ids", expanding=True)
+    )
+
+    rows = {}
+    for start in range(0, len(operation_ids), MAX_IDS_PER_QUERY):
+        chunk = operation_ids[start:start + MAX_IDS_PER_QUERY]
+        for row in db.execute(query, {"operation_ids": chunk}).mappings():
+            rows[row.operation_id] = row
+    return rows
+
+
+def stream_operations(statement: TextClause, params: dict, is_superuser: bool, export_format: str) -> Iterator[bytes]:
+    """
+    Yields the operations matched by `statement` as NDJSON lines or CSV, one chunk per batch.
+    The session is opened here rather than taken from a dependency, since the response
+    is still streaming after the request's dependencies have been cleaned up.
+    """
+    db = MSSQLReadSessionLocal()
+    try:
+        result = db.execute(statement, params, execution_options={"yield_per": EXPORT_BATCH_SIZE}).mappings()
+
+        if export_format == "csv":
+            yield _to_csv([list(OperationResponse.model_fields)])
+
+        for rows in result.partitions():
+            if export_format == "csv":
+                yield _to_csv([list(operation_to_dict(row, is_superuser, exclude_none=False).values()) for row in rows])
+            else:
+                yield b"".join(dumps(operation_to_dict(row, is_superuser)) + b"\n" for row in rows)
+    finally:
+        db.close()
+
+
+def _to_csv(rows: list[list]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
@@ -0,0 +1,137 @@
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.db.query_builder import INTEGER_PARAM, MAX_IDS_PER_QUERY, STRING_PARAM, QueryTemplate
+from app.schemas.partners import PartnerResponse
+from app.serialization import RowSerializer
+
+# Partner columns shared by every partners query (field -> expression)
+PARTNER_COLUMN_EXPRESSIONS = {
+    "partner_id": "p.ID",
+    "partner_code": "p.Code",
+    "company": "COALESCE(p.Company, p.Company2)",
+    "mol": "COALESCE(p.MOL, p.MOL2)",
+    "city": "COALESCE(p.City, p.City2)",
+    "address": "COALESCE(p.Address, p.Address2)",
+    "phone": "COALESCE(p.Phone, p.Phone2)",
+    "fax": "p.Fax",
+    "email": "p.eMail",
+    "tax_no": "p.TaxNo",
+    "bulstat": "p.Bulstat",
+    "bank_name": "p.BankName",
+    "bank_code": "p.BankCode",
+    "bank_acct": "p.BankAcct",
+    "bank_vat_name": "p.BankVATName",
+    "bank_vat_code": "p.BankVATCode",
+    "bank_vat_acct": "p.BankVATAcct",
+    "price_group": "p.PriceGroup",
+    "discount": "p.Discount",
+    "type": "p.Type",
+    "is_very_used": "p.IsVeryUsed",
+    "user_id": "p.UserID",
+    "group_id": "p.GroupID",
+    "user_real_time": "p.UserRealTime",
+    "deleted": "p.Deleted",
+    "card_number": "p.CardNumber",
+    "note": "COALESCE(p.Note1, p.Note2)",
+    "payment_days": "p.PaymentDays",
+}
+PARTNER_FROM = " FROM dbo.Partners p WHERE 1=1"
+PARTNER_SELECT = (
+    "SELECT " + ", ".join(f"{expression} AS {name}" for name, expression in PARTNER_COLUMN_EXPRESSIONS.items()) + PARTNER_FROM
+)
+
+# Partner filters in their fixed order. The after_id filter is the cursor of keyset pagination.
+# The candidate_ids filter narrows the text filters through the search index (see `filter_candidates`).
+# The list can select a subset of the columns (`fields`), so the SELECT list is a placeholder.
+PARTNERS_QUERY = QueryTemplate(
+    "SELECT {columns}" + PARTNER_FROM,
+    filters=[
+        ("partner_id", "ID = :partner_id"),
+        ("candidate_ids", "(ID IN :candidate_ids OR ID > :indexed_up_to)"),
+        ("company", "Company LIKE :company"),
+        ("mol", "MOL LIKE :mol"),
+        ("phone", "Phone LIKE :phone"),
+        ("taxno", "TaxNO = :taxno"),
+        ("after_id", "ID > :after_id"),
+    ],
+    param_types={
+        "partner_id": INTEGER_PARAM,
+        "candidate_ids": INTEGER_PARAM,
+        "indexed_up_to": INTEGER_PARAM,
+        "company": STRING_PARAM,
+        "mol": STRING_PARAM,
+        "phone": STRING_PARAM,
+        "taxno": STRING_PARAM,
+        "after_id": INTEGER_PARAM,
+        "offset": INTEGER_PARAM,
+        "limit": INTEGER_PARAM,
+    },
+    columns=PARTNER_COLUMN_EXPRESSIONS,
+    expanding=("candidate_ids",)
+)
+PARTNERS_PAGE_ORDER = " ORDER BY ID OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+
+PARTNER_SERIALIZER = RowSerializer(PartnerResponse)
+
+
+def to_partner_response(row) -> PartnerResponse:
+    return PartnerResponse(
+        partner_id=row.partner_id,
+        partner_code=row.partner_code,
+        company=row.company,
+        mol=row.mol,
+        city=row.city,
+        address=row.address,
+        phone=row.phone,
+        fax=row.fax,
+        email=row.email,
+        tax_no=row.tax_no,
+        bulstat=row.bulstat,
+        bank_name=row.bank_name,
+        bank_code=row.bank_code,
+        bank_acct=row.bank_acct,
+        bank_vat_name=row.bank_vat_name,
+        bank_vat_code=row.bank_vat_code,
+        bank_vat_acct=row.bank_vat_acct,
+        price_group=row.price_group,
+        discount=row.discount,
+        type=row.type,
+        is_very_used=row.is_very_used,
+        user_id=row.user_id,
+        group_id=row.group_id,
+        user_real_time=row.user_real_time,
+        deleted=row.deleted,
+        card_number=row.card_number,
+        note=row.note,
+        payment_days=row.payment_days
+    )
+
+
+def partner_to_dict(row, fields: Optional[tuple[str, ...]] = None) -> dict:
+    """
+    Same fields as `to_partner_response`, without building the model (for list responses).
+    With `fields`, only those fields (see `RowSerializer.select_fields`).
+    """
+    return PARTNER_SERIALIZER.serialize(row, fields=fields)
+
+
+def partner_columns(rows: list, fields: Optional[tuple[str, ...]] = None) -> dict:
+    """Same fields as `partner_to_dict`, column by column (for columnar list responses)."""
+    return PARTNER_SERIALIZER.columns(rows, fields=fields)
+
+
+def fetch_partners_by_ids(mssql_db: Session, partner_ids: list[int]) -> dict:
+    """Returns the partner rows with the given IDs, keyed by ID."""
+    query = text(f"{PARTNER_SELECT} AND p.ID IN :partner_ids").bindparams(
+        bindparam("partner_ids", expanding=True)
+    )
+
+    rows = {}
+    for start in range(0, len(partner_ids), MAX_IDS_PER_QUERY):
+        chunk = partner_ids[start:start + MAX_IDS_PER_QUERY]
+        for row in mssql_db.execute(query, {"partner_ids": chunk}).mappings():
+            rows[row.partner_id] = row
+    return rows
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.locks import PRODUCT_SYNC_LOCK_KEY, try_advisory_lock
+from app.models import ProductSyncState
+
+logger = logging.getLogger(__name__)
+
+# Every dbo.Goods column exposed through the API; a change to any of them is synced to clients
+GOODS_CONTENT_QUERY = """
+    SELECT
+        ID, Code, BarCode1, BarCode2, BarCode3, Catalog1, Catalog2, Catalog3,
+        Name, Name2, Measure1, Measure2, Ratio, PriceIn,
+        PriceOut1, PriceOut2, PriceOut3, PriceOut4, PriceOut5,
+        PriceOut6, PriceOut7, PriceOut8, PriceOut9, PriceOut10,
+        MinQtty, NormalQtty, Description, Type, IsRecipe, TaxGroup, IsVeryUsed, GroupID, Deleted
+    FROM dbo.Goods
+"""
+
+UPSERT_BATCH_SIZE = 1000
+
+
+def hash_good(row) -> str:
+    """Returns the content hash of a dbo.Goods row."""
+    return hashlib.sha1(json.dumps(list(row), default=str).encode()).hexdigest()
+
+
+def refresh_product_sync_state(pg_db: Session, mssql_db: Session) -> int:
+    """
+    Compares the content hash of every good with the one stored in Postgres.
+    Goods that were inserted, changed, marked `Deleted` or removed since the previous run
+    get the next sync version. Returns the number of changed goods.
+    """
+    with try_advisory_lock(PRODUCT_SYNC_LOCK_KEY) as acquired:
+        if not acquired:
+            logger.info("Product sync refresh is already running in another worker.")
+            return 0
+
+        known = {
+            good_id: (content_hash, deleted)
+            for good_id, content_hash, deleted in pg_db.query(
+                ProductSyncState.good_id, ProductSyncState.content_hash, ProductSyncState.deleted
+            )
+        }
+        version = (pg_db.query(func.max(ProductSyncState.version)).scalar() or 0) + 1
+
+        changes = []
+        seen = set()
+        result = mssql_db.execute(text(GOODS_CONTENT_QUERY), execution_options={"yield_per": UPSERT_BATCH_SIZE})
+        for row in result:
+            seen.add(row.ID)
+            content_hash = hash_good(row)
+            deleted = bool(row.Deleted)
+            if known.get(row.ID) != (content_hash, deleted):
+                changes.append({"good_id": row.ID, "content_hash": content_hash, "version": version, "deleted": deleted})
+
+        # Goods removed from Microinvest altogether are synced as deleted
+        for good_id, (content_hash, deleted) in known.items():
+            if good_id not in seen and not deleted:
+                changes.append({"good_id": good_id, "content_hash": content_hash, "version": version, "deleted": True})
+
+        statement = insert(ProductSyncState)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ProductSyncState.good_id],
+            set_={
+                "content_hash": statement.excluded.content_hash,
+                "version": statement.excluded.version,
+                "deleted": statement.excluded.deleted,
+                "updated_at": func.now(),
+            }
+        )
+        for start in range(0, len(changes), UPSERT_BATCH_SIZE):
+            pg_db.execute(statement, changes[start:start + UPSERT_BATCH_SIZE])
+        pg_db.commit()
+
+        if changes:
+            logger.info(f"Product sync version {version}: {len(changes)} changed goods.")
+        return len(changes)
+
+
+def get_product_changes(pg_db: Session, since_version: int, since_good_id: int, limit: int) -> list[ProductSyncState]:
+    """Returns up to `limit` goods changed after the (version, good ID) position, in sync order."""
+    return pg_db.query(ProductSyncState).filter(
+        or_(
+            ProductSyncState.version > since_version,
+            and_(ProductSyncState.version == since_version, ProductSyncState.good_id > since_good_id)
+        )
+    ).order_by(ProductSyncState.version, ProductSyncState.good_id).limit(limit).all()
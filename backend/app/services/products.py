@@ -0,0 +1,152 @@
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.cache.price_projection import HAS_PRICE_CONDITION, PRICE_COLUMNS, price_projection
+from app.db.query_builder import INTEGER_PARAM, MAX_IDS_PER_QUERY, STRING_PARAM, QueryTemplate
+from app.schemas.products import ProductResponse
+from app.serialization import RowSerializer
+
+# Product columns shared by every products query (field -> expression); price_out comes from the price projection
+PRODUCT_COLUMN_EXPRESSIONS = {
+    "product_id": "ID",
+    "code": "Code",
+    "bar_code": "COALESCE(BarCode1, BarCode2, BarCode3)",
+    "catalog": "COALESCE(Catalog1, Catalog2, Catalog3)",
+    "name": "COALESCE(Name, Name2)",
+    "measure": "COALESCE(Measure1, Measure2)",
+    "ratio": "Ratio",
+    "price_in": "PriceIn",
+    "min_qtty": "MinQtty",
+    "normal_qtty": "NormalQtty",
+    "description": "Description",
+    "type": "Type",
+    "is_recipe": "IsRecipe",
+    "tax_group": "TaxGroup",
+    "is_very_used": "IsVeryUsed",
+    "group_id": "GroupID",
+    "deleted": "Deleted",
+}
+PRODUCT_COLUMNS = ", ".join(f"{expression} AS {name}" for name, expression in PRODUCT_COLUMN_EXPRESSIONS.items())
+
+# Product filters in their fixed order. The after_id filter is the cursor of keyset pagination.
+# The candidate_ids filter narrows the name filter through the search index (see `filter_candidates`).
+# The list can select a subset of the columns (`fields`), so the SELECT list is a placeholder.
+PRODUCTS_QUERY = QueryTemplate(
+    f"SELECT {{columns}} FROM dbo.Goods WHERE {HAS_PRICE_CONDITION}",
+    filters=[
+        ("product_id", "ID = :product_id"),
+        ("candidate_ids", "(ID IN :candidate_ids OR ID > :indexed_up_to)"),
+        ("name", "Name LIKE :name"),
+        ("code", "Code = :code"),
+        ("barcode", "COALESCE(BarCode1, BarCode2, BarCode3) = :barcode"),
+        ("after_id", "ID > :after_id"),
+    ],
+    param_types={
+        "product_id": INTEGER_PARAM,
+        "candidate_ids": INTEGER_PARAM,
+        "indexed_up_to": INTEGER_PARAM,
+        "name": STRING_PARAM,
+        "code": STRING_PARAM,
+        "barcode": STRING_PARAM,
+        "after_id": INTEGER_PARAM,
+        "offset": INTEGER_PARAM,
+        "limit": INTEGER_PARAM,
+    },
+    columns=PRODUCT_COLUMN_EXPRESSIONS,
+    expanding=("candidate_ids",)
+)
+PRODUCTS_PAGE_ORDER = " ORDER BY ID OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+
+PRODUCT_SERIALIZER = RowSerializer(ProductResponse)
+
+
+def to_product_response(row, is_superuser: bool, price_group: Optional[int] = None) -> ProductResponse:
+    return ProductResponse(
+        product_id=row.product_id,
+        code=row.code,
+        bar_code=row.bar_code,
+        catalog=row.catalog,
+        name=row.name,
+        measure=row.measure,
+        ratio=row.ratio,
+        # Hide price_in for non-admins
+        price_in=row.price_in if is_superuser else None,
+        price_out=price_projection.price_out(row.product_id, price_group),
+        min_qtty=row.min_qtty,
+        normal_qtty=row.normal_qtty,
+        description=row.description,
+        type=row.type,
+        is_recipe=row.is_recipe,
+        tax_group=row.tax_group,
+        is_very_used=row.is_very_used,
+        group_id=row.group_id,
+        deleted=row.deleted,
+    )
+
+
+def product_to_dict(
+    row, is_superuser: bool, price_group: Optional[int] = None, fields: Optional[tuple[str, ...]] = None
+) -> dict:
+    """
+    Same fields as `to_product_response`, without building the model (for list responses).
+    With `fields`, only those fields (see `RowSerializer.select_fields`).
+    """
+    return PRODUCT_SERIALIZER.serialize(
+        row,
+        # Hide price_in for non-admins
+        hidden=() if is_superuser else ("price_in",),
+        values={"price_out": price_projection.price_out(row["product_id"], price_group)} if selects_price(fields) else None,
+        fields=fields
+    )
+
+
+def product_columns(
+    rows: list, is_superuser: bool, price_group: Optional[int] = None, fields: Optional[tuple[str, ...]] = None
+) -> dict:
+    """Same fields as `product_to_dict`, column by column (for columnar list responses)."""
+    return PRODUCT_SERIALIZER.columns(
+        rows,
+        hidden=() if is_superuser else ("price_in",),
+        values={
+            "price_out": [price_projection.price_out(row["product_id"], price_group) for row in rows]
+        } if selects_price(fields) else None,
+        fields=fields
+    )
+
+
+def selects_price(fields: Optional[tuple[str, ...]]) -> bool:
+    """Whether price_out is among the selected fields (all fields when `fields` is None)."""
+    return fields is None or "price_out" in fields
+
+
+def approximate_product_count() -> Optional[int]:
+    """
+    Returns the number of goods with a price (the unfiltered products listing) from the price projection,
+    as of its last refresh. The table statistics cannot be used, they also count goods without a price.
+    """
+    return price_projection.priced_goods if price_projection.loaded else None
+
+
+def load_product_prices(mssql_db: Session, product_ids: list[int]):
+    """Makes sure the price projection has the prices of the given products."""
+    price_projection.ensure(mssql_db, product_ids)
+
+
+def fetch_products_by_ids(mssql_db: Session, product_ids: list[int]) -> dict:
+    """
+    Returns the product rows with the given IDs, keyed by ID.
+    Their prices are read as well and update the price projection.
+    """
+    query = text(
+        f"SELECT {PRODUCT_COLUMNS}, {PRICE_COLUMNS} FROM dbo.Goods WHERE {HAS_PRICE_CONDITION} AND ID IN :product_ids"
+    ).bindparams(bindparam("product_ids", expanding=True))
+
+    rows = {}
+    for start in range(0, len(product_ids), MAX_IDS_PER_QUERY):
+        chunk = product_ids[start:start + MAX_IDS_PER_QUERY]
+        for row in mssql_db.execute(query, {"product_ids": chunk}).mappings():
+            rows[row.product_id] = row
+    price_projection.update(rows)
+    return rows
@@ -0,0 +1,260 @@
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.orm import Session
+
+from app.config import config
+from app.db.locks import SALES_ROLLUP_LOCK_KEY, try_advisory_lock
+from app.enums.operations import OperationTypeID
+from app.models import RollupState, SalesDailyRollup
+from app.schemas.dashboard import DashboardResponse, TopEntity
+from app.services.dashboard import fetch_recent_operations
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = "sales_daily_rollup"
+
+# Aggregates the sales of [start_date, end_date) per day, user, partner and good
+ROLLUP_REFRESH_QUERY = """
+    SELECT
+        CAST(o.Date AS DATE) AS day,
+        o.UserID AS user_id,
+        o.PartnerID AS partner_id,
+        MAX(p.Company) AS partner_name,
+        o.GoodID AS good_id,
+        MAX(g.Name) AS good_name,
+        COUNT(*) AS total_sales,
+        SUM(o.Qtty) AS total_quantity,
+        SUM(o.PriceOut * o.Qtty) AS total_revenue
+    FROM dbo.Operations o
+    LEFT JOIN dbo.Partners p ON o.PartnerID = p.ID
+    LEFT JOIN dbo.Goods g ON o.GoodID = g.ID
+    WHERE o.OperType = :operation_type
+    AND o.Date >= :start_date AND o.Date < :end_date
+    GROUP BY CAST(o.Date AS DATE), o.UserID, o.PartnerID, o.GoodID
+"""
+
+# Totals, per-partner and per-good sums of the rolled-up days (Postgres)
+ROLLUP_AGGREGATES_QUERY = """
+    SELECT
+        CASE
+            WHEN GROUPING(partner_id) = 0 THEN 'partner'
+            WHEN GROUPING(good_id) = 0 THEN 'good'
+            ELSE 'totals'
+        END AS row_kind,
+        COALESCE(partner_id, good_id) AS entity_id,
+        CASE WHEN GROUPING(partner_id) = 0 THEN MAX(partner_name) ELSE MAX(good_name) END AS entity_name,
+        SUM(total_sales) AS total_sales,
+        SUM(total_quantity) AS total_quantity,
+        SUM(total_revenue) AS total_revenue
+    FROM sales_daily_rollup
+    WHERE day BETWEEN :first_day AND :last_day
+    {user_filter}
+    GROUP BY GROUPING SETS ((), (partner_id), (good_id))
+"""
+
+# The same aggregates over the raw operations outside the rolled-up days (MSSQL)
+RAW_AGGREGATES_QUERY = """
+    SELECT
+        CASE
+            WHEN GROUPING(o.PartnerID) = 0 THEN 'partner'
+            WHEN GROUPING(o.GoodID) = 0 THEN 'good'
+            ELSE 'totals'
+        END AS row_kind,
+        COALESCE(o.PartnerID, o.GoodID) AS entity_id,
+        CASE WHEN GROUPING(o.PartnerID) = 0 THEN MAX(p.Company) ELSE MAX(g.Name) END AS entity_name,
+        COUNT(*) AS total_sales,
+        SUM(o.Qtty) AS total_quantity,
+        SUM(o.PriceOut * o.Qtty) AS total_revenue
+    FROM dbo.Operations o
+    LEFT JOIN dbo.Partners p ON o.PartnerID = p.ID
+    LEFT JOIN dbo.Goods g ON o.GoodID = g.ID
+    WHERE o.OperType = :operation_type
+    AND ({date_filter})
+    {user_filter}
+    GROUP BY GROUPING SETS ((), (o.PartnerID), (o.GoodID))
+"""
+
+
+def get_rolled_up_range(pg_db: Session) -> Optional[tuple[date, date]]:
+    """Returns the first and last day (inclusive) the rollup is complete for, or None if it was never built."""
+    row = pg_db.query(RollupState.rolled_up_from, RollupState.rolled_up_to).filter(RollupState.name == ROLLUP_NAME).first()
+    return (row.rolled_up_from, row.rolled_up_to) if row is not None else None
+
+
+def refresh_sales_rollup(pg_db: Session, mssql_db: Session):
+    """
+    Incrementally refreshes the daily sales rollup up to (and including) yesterday.
+    - The last `SALES_ROLLUP_LOOKBACK_DAYS` rolled-up days are re-aggregated to pick up late edits.
+      Edits to operations older than that are not picked up; the dashboard keeps showing the rolled-up
+      figures for those days until the rollup is rebuilt (delete its `rollup_state` row).
+    - The first run backfills `SALES_ROLLUP_BACKFILL_DAYS` days. Days before that are never rolled up.
+    - Days are processed in chunks, each committed together with the new watermarks.
+    """
+    with try_advisory_lock(SALES_ROLLUP_LOCK_KEY) as acquired:
+        if not acquired:
+            logger.info("Sales rollup refresh is already running in another worker.")
+            return
+
+        last_day = date.today() - timedelta(days=1)
+        rolled_up_range = get_rolled_up_range(pg_db)
+        if rolled_up_range is None:
+            first_day = last_day - timedelta(days=config["SALES_ROLLUP_BACKFILL_DAYS"] - 1)
+        else:
+            first_day = rolled_up_range[1] + timedelta(days=1 - config["SALES_ROLLUP_LOOKBACK_DAYS"])
+
+        chunk_start = first_day
+        while chunk_start <= last_day:
+            chunk_end = min(chunk_start + timedelta(days=30), last_day)
+            _refresh_days(pg_db, mssql_db, chunk_start, chunk_end)
+            chunk_start = chunk_end + timedelta(days=1)
+
+        logger.info(f"Sales rollup refreshed from {first_day} to {last_day}.")
+
+
+def _refresh_days(pg_db: Session, mssql_db: Session, first_day: date, last_day: date):
+    rows = mssql_db.execute(text(ROLLUP_REFRESH_QUERY), {
+        "operation_type": OperationTypeID.SALE,
+        "start_date": datetime.combine(first_day, time.min),
+        "end_date": datetime.combine(last_day + timedelta(days=1), time.min),
+    }).mappings().all()
+
+    pg_db.execute(delete(SalesDailyRollup).where(SalesDailyRollup.day.between(first_day, last_day)))
+    if rows:
+        pg_db.execute(insert(SalesDailyRollup), [
+            {
+                "day": row.day,
+                "user_id": row.user_id,
+                "partner_id": row.partner_id,
+                "partner_name": row.partner_name,
+                "good_id": row.good_id,
+                "good_name": row.good_name,
+                "total_sales": row.total_sales,
+                "total_quantity": row.total_quantity or 0,
+                "total_revenue": row.total_revenue or 0,
+            }
+            for row in rows
+        ])
+
+    state = pg_db.query(RollupState).filter(RollupState.name == ROLLUP_NAME).first()
+    if state is None:
+        pg_db.add(RollupState(name=ROLLUP_NAME, rolled_up_from=first_day, rolled_up_to=last_day))
+    else:
+        state.rolled_up_from = min(state.rolled_up_from, first_day)
+        state.rolled_up_to = max(state.rolled_up_to, last_day)
+    pg_db.commit()
+
+
+def read_rollup_aggregates(
+    pg_db: Session,
+    start_date: str,
+    end_date: str,
+    microinvest_user_id: int,
+    is_staff: bool
+) -> Optional[tuple[date, date, list]]:
+    """
+    Returns the first and last rolled-up day of the window and the rollup's aggregates over them,
+    for `build_dashboard_from_rollup`. Returns None if the window is too short or the rollup
+    does not cover any full day of it, so the caller builds the dashboard from the raw operations.
+    """
+    start = datetime.fromisoformat(str(start_date))
+    end = datetime.fromisoformat(str(end_date))
+    if end - start < timedelta(days=config["SALES_ROLLUP_MIN_DAYS"]):
+        return None
+
+    rolled_up_range = get_rolled_up_range(pg_db)
+    if rolled_up_range is None:
+        return None
+    rolled_up_from, rolled_up_to = rolled_up_range
+
+    # Whole days of the window which are already rolled up
+    first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_day = end.date() if end.time() >= time(23, 59, 59) else end.date() - timedelta(days=1)
+    first_day = max(first_day, rolled_up_from)
+    last_day = min(last_day, rolled_up_to)
+    if last_day < first_day:
+        return None
+
+    user_filter = "" if is_staff else "AND user_id = :user_id"
+    rollup_rows = pg_db.execute(text(ROLLUP_AGGREGATES_QUERY.format(user_filter=user_filter)), {
+        "first_day": first_day,
+        "last_day": last_day,
+        "user_id": microinvest_user_id,
+    }).mappings().all()
+    return first_day, last_day, rollup_rows
+
+
+def build_dashboard_from_rollup(
+    mssql_db: Session,
+    rollup: tuple[date, date, list],
+    start_date: str,
+    end_date: str,
+    microinvest_user_id: int,
+    is_staff: bool
+) -> DashboardResponse:
+    """
+    Builds the dashboard from the rollup aggregates read by `read_rollup_aggregates`, scanning
+    raw operations only for the parts of the window the rollup does not cover (partial days,
+    days before the backfill and days not rolled up yet).
+    """
+    first_day, last_day, rollup_rows = rollup
+    start = datetime.fromisoformat(str(start_date))
+    end = datetime.fromisoformat(str(end_date))
+
+    # Raw operations before the first and after the last rolled-up day
+    date_filters = []
+    params = {"operation_type": OperationTypeID.SALE, "user_id": microinvest_user_id}
+    if start < datetime.combine(first_day, time.min):
+        date_filters.append("(o.Date >= :head_start AND o.Date < :head_end)")
+        params["head_start"] = start
+        params["head_end"] = datetime.combine(first_day, time.min)
+    tail_start = datetime.combine(last_day + timedelta(days=1), time.min)
+    if tail_start <= end:
+        date_filters.append("(o.Date >= :tail_start AND o.Date <= :tail_end)")
+        params["tail_start"] = tail_start
+        params["tail_end"] = end
+
+    raw_rows = []
+    if date_filters:
+        raw_query = RAW_AGGREGATES_QUERY.format(
+            date_filter=" OR ".join(date_filters),
+            user_filter="" if is_staff else "AND o.UserID = :user_id"
+        )
+        raw_rows = mssql_db.execute(text(raw_query), params).mappings().all()
+
+    # Merge the rolled-up and raw aggregates
+    total_sales, total_quantity, total_revenue = 0, 0.0, 0.0
+    partners: dict[int, list] = {}  # partner ID -> [name, revenue]
+    goods: dict[int, list] = {}  # good ID -> [name, revenue]
+    for row in [*rollup_rows, *raw_rows]:
+        if row.row_kind == "totals":
+            total_sales += row.total_sales or 0
+            total_quantity += row.total_quantity or 0
+            total_revenue += row.total_revenue or 0
+            continue
+        if row.entity_id is None:
+            continue
+
+        entities = partners if row.row_kind == "partner" else goods
+        entity = entities.setdefault(row.entity_id, [row.entity_name, 0.0])
+        entity[0] = entity[0] or row.entity_name
+        entity[1] += row.total_revenue or 0
+
+    return DashboardResponse(
+        total_sales=total_sales,
+        total_quantity=total_quantity,
+        total_revenue=total_revenue,
+        top_partner=_top_entity(partners),
+        top_good=_top_entity(goods),
+        recent_operations=fetch_recent_operations(mssql_db, start_date, end_date, microinvest_user_id, is_staff)
+    )
+
+
+def _top_entity(entities: dict[int, list]) -> Optional[TopEntity]:
+    named = [(entity_id, name, value) for entity_id, (name, value) in entities.items() if name is not None]
+    if not named:
+        return None
+    entity_id, name, value = max(named, key=lambda entity: entity[2])
+    return TopEntity(id=entity_id, name=name, value=value)
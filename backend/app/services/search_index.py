@@ -0,0 +1,201 @@
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import bindparam, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import config
+from app.db.locks import SEARCH_INDEX_LOCK_KEY, try_advisory_lock
+from app.db.query_builder import MAX_IDS_PER_QUERY, pad_ids
+from app.models import SearchEntry
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_KIND = "product"
+PARTNER_KIND = "partner"
+
+# Searchable fields per kind: the name first, then the codes which are also matched exactly
+SEARCH_SOURCE_QUERIES = {
+    PRODUCT_KIND: """
+        SELECT ID, COALESCE(Name, Name2) AS name, Code, BarCode1, BarCode2, BarCode3
+        FROM dbo.Goods
+    """,
+    PARTNER_KIND: """
+        SELECT ID, COALESCE(Company, Company2) AS name, COALESCE(MOL, MOL2) AS mol,
+            Code, COALESCE(Phone, Phone2) AS phone, TaxNo, Bulstat
+        FROM dbo.Partners
+    """,
+}
+SEARCH_TEXT_COLUMNS = {
+    PRODUCT_KIND: ("name",),
+    PARTNER_KIND: ("name", "mol"),
+}
+SEARCH_CODE_COLUMNS = {
+    PRODUCT_KIND: ("Code", "BarCode1", "BarCode2", "BarCode3"),
+    PARTNER_KIND: ("Code", "phone", "TaxNo", "Bulstat"),
+}
+
+UPSERT_BATCH_SIZE = 1000
+
+# A match on an exact code outranks a substring match, which outranks a fuzzy one
+SEARCH_QUERY = text(r"""
+    SELECT
+        entity_id,
+        CASE WHEN :query = ANY(string_to_array(codes, ' ')) THEN 2 ELSE 0 END
+            + CASE WHEN search_text LIKE :pattern ESCAPE '\' THEN 1 ELSE 0 END
+            + word_similarity(:query, search_text) AS score
+    FROM search_entries
+    WHERE kind = :kind
+        AND (search_text LIKE :pattern ESCAPE '\' OR :query <% search_text)
+    ORDER BY score DESC, entity_id
+    LIMIT :limit
+""")
+
+# Entities whose indexed text contains every filter term
+FILTER_CANDIDATES_QUERY = r"""
+    SELECT entity_id
+    FROM search_entries
+    WHERE kind = :kind {conditions}
+    LIMIT :limit
+"""
+INDEXED_UP_TO_QUERY = text("SELECT MAX(entity_id) FROM search_entries WHERE kind = :kind")
+
+_WHITESPACE = re.compile(r"\s+")
+# MSSQL LIKE wildcards, which the index cannot match the same way
+_LIKE_WILDCARDS = re.compile(r"[%_\[]")
+
+
+def normalize_search_text(value) -> str:
+    """Lower-cases a value and collapses its whitespace, the same way for indexed text and queries."""
+    return _WHITESPACE.sub(" ", str(value)).strip().lower() if value is not None else ""
+
+
+def _search_entry(kind: str, row) -> dict:
+    codes = " ".join(dict.fromkeys(
+        code for code in (normalize_search_text(row._mapping[column]).replace(" ", "") for column in SEARCH_CODE_COLUMNS[kind]) if code
+    ))
+    names = [normalize_search_text(row._mapping[column]) for column in SEARCH_TEXT_COLUMNS[kind]]
+    search_text = " ".join(value for value in (*names, codes) if value)
+    return {"kind": kind, "entity_id": row.ID, "search_text": search_text, "codes": codes}
+
+
+def refresh_search_index(pg_db: Session, mssql_db: Session) -> int:
+    """
+    Copies the names and codes of Microinvest products and partners into `search_entries`,
+    where a pg_trgm index answers substring and similarity searches.
+    Only entries that changed since the previous run are written. Returns the number of changes.
+    """
+    with try_advisory_lock(SEARCH_INDEX_LOCK_KEY) as acquired:
+        if not acquired:
+            logger.info("Search index refresh is already running in another worker.")
+            return 0
+
+        statement = insert(SearchEntry)
+        statement = statement.on_conflict_do_update(
+            index_elements=[SearchEntry.kind, SearchEntry.entity_id],
+            set_={
+                "search_text": statement.excluded.search_text,
+                "codes": statement.excluded.codes,
+                "updated_at": func.now(),
+            }
+        )
+        delete_statement = text(
+            "DELETE FROM search_entries WHERE kind = :kind AND entity_id = ANY(:entity_ids)"
+        ).bindparams(bindparam("entity_ids"))
+
+        changed = 0
+        for kind, source_query in SEARCH_SOURCE_QUERIES.items():
+            known = {
+                entity_id: (search_text, codes)
+                for entity_id, search_text, codes in pg_db.query(
+                    SearchEntry.entity_id, SearchEntry.search_text, SearchEntry.codes
+                ).filter(SearchEntry.kind == kind)
+            }
+
+            changes = []
+            seen = set()
+            result = mssql_db.execute(text(source_query), execution_options={"yield_per": UPSERT_BATCH_SIZE})
+            for row in result:
+                entry = _search_entry(kind, row)
+                seen.add(row.ID)
+                if known.get(row.ID) != (entry["search_text"], entry["codes"]):
+                    changes.append(entry)
+
+            for start in range(0, len(changes), UPSERT_BATCH_SIZE):
+                pg_db.execute(statement, changes[start:start + UPSERT_BATCH_SIZE])
+
+            removed = [entity_id for entity_id in known if entity_id not in seen]
+            for start in range(0, len(removed), UPSERT_BATCH_SIZE):
+                pg_db.execute(delete_statement, {"kind": kind, "entity_ids": removed[start:start + UPSERT_BATCH_SIZE]})
+
+            changed += len(changes) + len(removed)
+        pg_db.commit()
+
+        if changed:
+            logger.info(f"Search index refreshed: {changed} changed entries.")
+        return changed
+
+
+def _like_pattern(query: str) -> str:
+    # Escape LIKE wildcards so they are matched literally
+    return "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def filter_candidates(
+    pg_db: Session, kind: str, terms: list[str], code_terms: list[str] = ()
+) -> Optional[tuple[list[int], int]]:
+    """
+    Narrows `LIKE '%term%'` list filters through the trigram index instead of scanning MSSQL.
+    Returns the IDs whose indexed text contains every term, a superset of the rows the filters
+    match (the filters are still applied to them), and the highest indexed ID: entities added since
+    the last refresh are not indexed yet and must be checked as well. `code_terms` are matched
+    like the indexed codes, without spaces (e.g. phone numbers).
+    Returns None if the index cannot narrow the filters: it is not built yet, a term uses LIKE
+    wildcards, or more than MAX_IDS_PER_QUERY entities match.
+    """
+    if any(_LIKE_WILDCARDS.search(term) for term in [*terms, *code_terms]):
+        return None
+    patterns = [
+        *(normalize_search_text(term) for term in terms),
+        *(normalize_search_text(term).replace(" ", "") for term in code_terms),
+    ]
+    patterns = [pattern for pattern in patterns if pattern]
+    if not patterns:
+        return None
+
+    conditions = "".join(f" AND search_text LIKE :pattern_{index} ESCAPE '\\'" for index in range(len(patterns)))
+    params = {f"pattern_{index}": _like_pattern(pattern) for index, pattern in enumerate(patterns)}
+    try:
+        indexed_up_to = pg_db.execute(INDEXED_UP_TO_QUERY, {"kind": kind}).scalar()
+        if indexed_up_to is None:
+            return None
+        rows = pg_db.execute(
+            text(FILTER_CANDIDATES_QUERY.format(conditions=conditions)),
+            {"kind": kind, "limit": MAX_IDS_PER_QUERY + 1, **params}
+        )
+        entity_ids = [row.entity_id for row in rows]
+    except SQLAlchemyError as e:
+        # The filters still work without the index, only slower
+        logger.warning(f"Search index unavailable for {kind} filters: {e}")
+        pg_db.rollback()
+        return None
+    if len(entity_ids) > MAX_IDS_PER_QUERY:
+        return None
+    return pad_ids(sorted(entity_ids)), indexed_up_to
+
+
+def search_entities(pg_db: Session, kind: str, query: str, limit: int) -> list[int]:
+    """Returns the IDs of the `kind` entities best matching `query`, best match first."""
+    query = normalize_search_text(query)
+    pattern = _like_pattern(query)
+
+    # Only applies to the current transaction; `<%` matches at or above this word similarity
+    pg_db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(config["SEARCH_SIMILARITY_THRESHOLD"])}
+    )
+    rows = pg_db.execute(SEARCH_QUERY, {"kind": kind, "query": query, "pattern": pattern, "limit": limit})
+    return [row.entity_id for row in rows]
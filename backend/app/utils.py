@@ -2,9 +2,12 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import select, text
 from app import models
+from app.cache.token_blacklist import token_blacklist_cache
+from app.cache.user_mapping import get_cached_user_mapping, cache_user_mapping
 from app.db import database
 from app.config import config
 from app.schemas.user_mapping import UserMappingResponse
@@ -33,23 +36,49 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def is_token_blacklisted(token: str, db: Session) -> bool:
     """Checks if the token is in the blacklist"""
+    # The in-memory cache rules out most tokens, Postgres only confirms possible matches
+    if not token_blacklist_cache.might_contain(token):
+        return False
     return db.query(models.TokenBlacklist).filter_by(token=token).first() is not None
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_postgres_db)):
-    """Retrieves the currently authenticated user based on the provided token."""
+async def is_token_blacklisted_async(token: str, db: AsyncSession) -> bool:
+    """Same as `is_token_blacklisted`, on an async session."""
+    if not token_blacklist_cache.might_contain(token):
+        return False
+    result = await db.execute(select(models.TokenBlacklist.id).filter_by(token=token).limit(1))
+    return result.first() is not None
+
+
+def get_token_subject(token: str, db: Session) -> str:
+    """Validates the token and returns its subject (the user's email)."""
+    if is_token_blacklisted(token=token, db=db):
+        _raise_token_blacklisted()
+    return decode_token_subject(token)
+
+
+async def get_token_subject_async(token: str, db: AsyncSession) -> str:
+    """Same as `get_token_subject`, on an async session."""
+    if await is_token_blacklisted_async(token=token, db=db):
+        _raise_token_blacklisted()
+    return decode_token_subject(token)
+
+
+def _raise_token_blacklisted():
+    raise HTTPException(
+        status_code=401,
+        detail="Token has been blacklisted. Please log in again."
+    )
+
+
+def decode_token_subject(token: str) -> str:
+    """Verifies the token's signature and expiry and returns its subject."""
     credentials_exception = HTTPException(
         status_code=401,
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    if is_token_blacklisted(token=token, db=db):
-        raise HTTPException(
-            status_code=401,
-            detail="Token has been blacklisted. Please log in again."
-        )
-
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -58,40 +87,71 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
 
+    return email
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_postgres_db)):
+    """Retrieves the currently authenticated user based on the provided token."""
+    email = get_token_subject(token, db)
+
     user = db.query(models.User).filter(models.User.email == email).first()
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
-def get_current_user_with_mapping(
+async def get_current_user_with_mapping(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(database.get_postgres_db),
-    db_mssql: Session = Depends(database.get_mssql_db),
+    db: AsyncSession = Depends(database.get_async_postgres_db),
+    db_mssql: AsyncSession = Depends(database.get_async_mssql_db),
 ) -> UserMappingResponse:
-    """Retrieves authenticated user and ensures they are mapped to Microinvest."""
-    user = get_current_user(token, db)
+    """
+    Retrieves authenticated user and ensures they are mapped to Microinvest.
+    The resolved mapping is cached for a short time, so most requests skip the
+    Postgres and MSSQL lookups. Runs on the event loop with async sessions, so the
+    async Microinvest routes need no threadpool thread or sync connection to authenticate.
+    """
+    email = await get_token_subject_async(token, db)
+
+    cached_mapping = await get_cached_user_mapping(email)
+    if cached_mapping is not None:
+        return cached_mapping
+
+    # Fetch the user together with its Microinvest mapping in a single query
+    result = (await db.execute(
+        select(User, UserMapping).outerjoin(UserMapping, UserMapping.user_id == User.id).where(User.email == email)
+    )).first()
+
+    if result is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     # Check if user is mapped to Microinvest
-    user_mapping = db.query(UserMapping).filter(
-        UserMapping.user_id == user.id
-    ).first()
-
+    user, user_mapping = result
     if not user_mapping:
         raise HTTPException(status_code=403, detail="User is not mapped to Microinvest")
 
     # Fetch UserLevel from Microinvest
     query = text("SELECT UserLevel FROM dbo.Users WHERE ID = :user_id")
-    user_level = db_mssql.execute(query, {"user_id": user_mapping.microinvest_user_id}).scalar()
+    user_level = (await db_mssql.execute(query, {"user_id": user_mapping.microinvest_user_id})).scalar()
 
     if user_level is None:
         raise HTTPException(status_code=404, detail="Microinvest user not found")
 
-    return UserMappingResponse(
+    response = UserMappingResponse(
         id=user_mapping.id,
         user_id=user_mapping.user_id,
         microinvest_user_id=user_mapping.microinvest_user_id,
         user_level=user_level
     )
+    await cache_user_mapping(email, response)
+    return response
 
 
@@ -0,0 +1,55 @@
+"""
+Measures how long importing the app takes and checks that it opens no database connections.
+Each run imports `app.main` in a fresh interpreter, the way a new worker boots.
+
+    cd backend && python scripts/benchmark_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter: counts connections opened by any engine while importing the app
+IMPORT_APP = """
+import json, time
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+connections = []
+event.listen(Pool, "connect", lambda dbapi_connection, record: connections.append(record))
+
+started_at = time.perf_counter()
+import app.main
+print(json.dumps({"seconds": time.perf_counter() - started_at, "connections": len(connections)}))
+"""
+
+
+def run_once() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_APP], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh-interpreter imports to time")
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    seconds = [result["seconds"] for result in results]
+    connections = max(result["connections"] for result in results)
+
+    print(f"import app.main over {args.runs} runs: "
+          f"min {min(seconds) * 1000:.0f} ms, median {statistics.median(seconds) * 1000:.0f} ms, "
+          f"max {max(seconds) * 1000:.0f} ms")
+    print(f"database connections opened while importing: {connections}")
+    sys.exit(1 if connections else 0)
+
+
+if __name__ == "__main__":
+    main()